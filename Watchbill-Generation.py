@@ -1,187 +1,45 @@
-import matplotlib
-matplotlib.use('Agg')  # Use the Agg backend for matplotlib
-
-import random
+# Heavier modules (tkcalendar, the optimizer) are imported inside the windows that use them,
+# so opening the main window does not pay for them. benchmarks/bench_startup.py keeps an eye on this.
 import tkinter as tk
-from tkinter import ttk  # Import ttk for Treeview
+from tkinter import ttk  # Import ttk for Notebook
 from tkinter import messagebox
-from tkcalendar import DateEntry  # Import DateEntry for calendar widget
+from tkinter import filedialog
 import sqlite3
-import re
-from datetime import datetime
+from datetime import datetime, timedelta
+import watchbill_db
+import watchbill_engine
+import watchbill_export
+import watchbill_import
+import watchbill_profile
+import watchbill_widgets
+from watchbill_db import (
+    get_eligibility_index, add_sailor, remove_sailor,
+    edit_sailor, get_sailors, add_qualification, remove_qualification, rename_qualification,
+    get_qualifications, set_qualification_order, get_sailor_qualifications, update_sailor_qualifications,
+    get_watchstations, add_watchstation, remove_watchstation, rename_watchstation,
+    set_watchstation_order, get_watch_times, add_watch_time, remove_watch_time, edit_watch_time, add_leave,
+    remove_leave, get_leaves, get_leave, get_sailors_on_leave, edit_leave, get_roster_inputs, get_watchbill_inputs,
+    save_watchbill, save_assignment, load_watchbill, get_saved_watchbill_dates, iter_saved_watchbills, get_watch_history,
+    resolve_saved_watchbills
+)
 qualification_listbox = None  # Initialize to None
+LEAVE_LIST_PAST_DAYS = 30  # The leave window lists leave from a month back...
+LEAVE_LIST_FUTURE_DAYS = 180  # ...to six months ahead, until the user widens it
+LEAVE_SORT_OPTIONS = {"Start Date": "start", "End Date": "end", "Name": "name", "Leave ID": "id"}  # Label -> get_leaves() order
 
 
-# --- Database Setup ---
-conn = sqlite3.connect('watchbill.db')  # Your database file
-cursor = conn.cursor()
-
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS sailors (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        rank TEXT,
-        last_name TEXT,
-        qualifications TEXT
-    )
-''')
-
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS qualifications (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT UNIQUE
-    )
-''')
-
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS watchstations (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT UNIQUE,
-        display_order INTEGER
-    )
-''')
-
-# --- Attempt to add display_order column only if it doesn't exist ---
-try:
-    cursor.execute("ALTER TABLE qualifications ADD COLUMN display_order INTEGER;")
-    conn.commit()
-    print("display_order column added to qualifications successfully!")
-    # If adding the column succeeded, update existing data:
-    cursor.execute("UPDATE qualifications SET display_order = id WHERE display_order IS NULL;")  # Initial order based on id
-    conn.commit()
-
-except sqlite3.OperationalError as e:
-    if "duplicate column name" in str(e):
-        print("display_order column already exists in qualifications.")
-        # Now update any existing rows that might not have a display_order yet:
-        cursor.execute("UPDATE watchstations SET display_order = (SELECT COUNT(*) FROM watchstations WHERE id <= watchstations.id) WHERE display_order IS NULL;")
-        conn.commit()
-        print("Existing watchstations updated with display_order values (if necessary).")
-
-
-    else:
-        print(f"Error adding display_order to qualifications table: {e}")
-
-
-
-# Create the watch times table
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS watch_times (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        start_time TEXT,
-        end_time TEXT,
-        UNIQUE(start_time, end_time)  -- Prevent duplicate entries
-    )
-''')
-
-# Create the leaves table
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS leaves (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        sailor_id INTEGER,
-        start_date DATE,
-        end_date DATE,
-        type TEXT,
-        notes TEXT,
-        FOREIGN KEY (sailor_id) REFERENCES sailors (id)
-    )
-''')
-
-conn.commit()  # Commit after creating tables
-
-conn.commit()  # Commit after creating tables
-
 # --- Data Access Functions ---
-def add_sailor(rank, last_name):
-    cursor.execute("INSERT INTO sailors (rank, last_name, qualifications) VALUES (?, ?, ?)", (rank, last_name, ""))
-    conn.commit()
-
-def remove_sailor(last_name):
-    cursor.execute("DELETE FROM sailors WHERE last_name=?", (last_name,))
-    conn.commit()
-
-def edit_sailor(old_last_name, new_rank, new_last_name):
-    cursor.execute("UPDATE sailors SET rank=?, last_name=? WHERE last_name=?", (new_rank, new_last_name, old_last_name))
-    conn.commit()
-
-def get_sailors():
-    cursor.execute("SELECT rank, last_name, qualifications FROM sailors")
-    return cursor.fetchall()
-
-def add_qualification(qualification):
-    try:
-        cursor.execute("INSERT INTO qualifications (name) VALUES (?)", (qualification,))
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
-        return False
-
-def remove_qualification(qualification):
-    cursor.execute("DELETE FROM qualifications WHERE name=?", (qualification,))
-    conn.commit()
-
-def rename_qualification(old_name, new_name):
-    try:
-        cursor.execute("UPDATE qualifications SET name=? WHERE name=?", (new_name, old_name))
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
-        return False
-
-def get_qualifications():
-    cursor.execute("SELECT name FROM qualifications ORDER BY display_order") # Add ORDER BY
-    return [row[0] for row in cursor.fetchall()]
-
-def get_sailor_qualifications(last_name):
-    cursor.execute("SELECT qualifications FROM sailors WHERE last_name=?", (last_name,))
-    result = cursor.fetchone()
-    if result:
-        return result[0].split(",") if result[0] else []
-    else:
-        return []
-
-def update_sailor_qualifications(last_name, qualifications):
-    cursor.execute("UPDATE sailors SET qualifications=? WHERE last_name=?", (",".join(qualifications), last_name))
-    conn.commit()
-
-def get_sailor_id(last_name):
-    cursor.execute("SELECT id FROM sailors WHERE last_name=?", (last_name,))
-    result = cursor.fetchone()
-    return result[0] if result else None
-
-def add_leave(sailor_id, start_date, end_date, leave_type, notes):
-    start_date_str = start_date.strftime('%Y-%m-%d')  # Format the date
-    end_date_str = end_date.strftime('%Y-%m-%d')  # Format the date
-    cursor.execute("INSERT INTO leaves (sailor_id, start_date, end_date, type, notes) VALUES (?, ?, ?, ?, ?)",
-                   (sailor_id, start_date_str, end_date_str, leave_type, notes))
-    conn.commit()
-
-
-def remove_leave(leave_id):
-    cursor.execute("DELETE FROM leaves WHERE id=?", (leave_id,))
-    conn.commit()
-
-def get_leaves():
-    cursor.execute("SELECT l.id, s.last_name, l.start_date, l.end_date, l.type, l.notes, s.rank "
-                   "FROM leaves l "
-                   "JOIN sailors s ON l.sailor_id = s.id")
-    return cursor.fetchall()  # Added rank to the query
-
-def edit_leave(leave_id, new_start_date, new_end_date, new_leave_type, new_notes):
-    new_start_date_str = new_start_date.strftime('%Y-%m-%d') # Format the date
-    new_end_date_str = new_end_date.strftime('%Y-%m-%d')     # Format the date
-
-    cursor.execute("UPDATE leaves SET start_date=?, end_date=?, type=?, notes=? WHERE id=?",
-                   (new_start_date_str, new_end_date_str, new_leave_type, new_notes, leave_id))
-    conn.commit()
-
 def update_qualification_order_in_db():
-    qualifications = qualification_listbox.get(0, tk.END)
-    for index, qual_name in enumerate(qualifications):
-        cursor.execute("UPDATE qualifications SET display_order = ? WHERE name = ?", (index, qual_name))
-    conn.commit()
+    set_qualification_order(qualification_listbox.get(0, tk.END))
 
 # --- GUI Functions ---
 
+def resolve_saved_watchbills_and_report(start_date, end_date=None, unavailable=()):
+    """Repairs saved watchbills affected by a change and tells the user if any watch moved."""
+    changed = resolve_saved_watchbills(start_date, end_date, unavailable)
+    if changed:
+        messagebox.showinfo("Watchbills Updated", f"Reassigned {changed} watch(es) on saved watchbills affected by this change.")
+
 def manage_sailors():
     """Opens a new window to manage sailor information."""
 
@@ -202,9 +60,9 @@ def manage_sailors():
     def remove_sailor_from_db():
         """Removes the selected sailor from the database."""
         try:
-            selection = sailor_listbox.curselection()[0]
-            last_name = sailor_listbox.get(selection).split()[1]  # Get last name from listbox
-            remove_sailor(last_name)
+            sailor_id = sailor_ids[sailor_listbox.curselection()[0]]
+            resolve_saved_watchbills_and_report(datetime.now().date(), unavailable={sailor_id})
+            remove_sailor(sailor_id)
             update_sailor_list()
         except IndexError:
             messagebox.showwarning("No Selection", "Please select a sailor to remove.")
@@ -212,14 +70,13 @@ def manage_sailors():
     def edit_sailor_in_db():
         """Edits the details of the selected sailor in the database."""
         try:
-            selection = sailor_listbox.curselection()[0]
-            old_last_name = sailor_listbox.get(selection).split()[1]  # Get old last name
+            sailor_id = sailor_ids[sailor_listbox.curselection()[0]]
 
             def save_changes_to_db():
                 """Saves the edited sailor details to the database."""
                 new_rank = edit_rank_entry.get()
                 new_last_name = edit_last_name_entry.get()
-                edit_sailor(old_last_name, new_rank, new_last_name)
+                edit_sailor(sailor_id, new_rank, new_last_name)
                 update_sailor_list()
                 edit_window.destroy()
 
@@ -248,9 +105,12 @@ def manage_sailors():
     def update_sailor_list():
         """Updates the listbox with the current sailor data from the database."""
         sailor_listbox.delete(0, tk.END)
-        for rank, last_name, _ in get_sailors():  # Use get_sailors() to fetch data
+        sailor_ids.clear()
+        for sailor_id, rank, last_name, _ in get_sailors():  # Use get_sailors() to fetch data
             sailor_listbox.insert(tk.END, f"{rank} {last_name}")
+            sailor_ids.append(sailor_id)  # Same index as the listbox row, so two Smiths stay apart
 
+    sailor_ids = []  # Sailor id of each listbox row
     sailor_window = tk.Toplevel(root)
     sailor_window.title("Manage Sailors")
 
@@ -315,10 +175,7 @@ def manage_qualifications():
 
     def update_qualification_order_in_db():
         """Updates the order of qualifications in the database to match the listbox."""
-        qualifications = qualification_listbox.get(0, tk.END)
-        for index, qual_name in enumerate(qualifications):
-            cursor.execute("UPDATE qualifications SET display_order = ? WHERE name = ?", (index, qual_name))
-        conn.commit()
+        set_qualification_order(qualification_listbox.get(0, tk.END))
 
     def add_qualification_to_db():
         """Adds a new qualification to the database."""
@@ -338,6 +195,7 @@ def manage_qualifications():
             qualification = qualification_listbox.get(selection)
             remove_qualification(qualification)  # Use the database function
             update_qualification_list()
+            resolve_saved_watchbills_and_report(datetime.now().date())  # Its holders may no longer qualify
         except IndexError:
             messagebox.showwarning("No Selection", "Please select a qualification to remove.")
 
@@ -357,6 +215,7 @@ def manage_qualifications():
                 else:
                     update_qualification_list()
                     rename_window.destroy()
+                    resolve_saved_watchbills_and_report(datetime.now().date())  # Stations may no longer match it
 
             rename_window = tk.Toplevel(qualification_window)
             rename_window.title("Rename Qualification")
@@ -417,20 +276,7 @@ def assign_qualifications():
             checkbox.destroy()
         checkboxes.clear()
 
-        # Get qualifications ordered by display_order (or id if no display_order is used)
-        try:
-            cursor.execute("SELECT name FROM qualifications ORDER BY display_order")  # Try display_order first
-            ordered_qualifications = cursor.fetchall()
-        except sqlite3.OperationalError as e: # If display_order column doesn't exist yet, fall back to id
-            if "no such column: display_order" in str(e):
-                cursor.execute("SELECT name FROM qualifications ORDER BY id")
-                ordered_qualifications = cursor.fetchall()
-            else:
-                print("Database query error", e)  # handle other db error here, probably crash/messagebox
-                return  # stop executing the function due to the error
-
-        for qual_name in ordered_qualifications:
-            qual = qual_name[0] # Extract the string from the fetched tuple
+        for qual in get_qualifications():  # In display order
             var = tk.BooleanVar()
             checkbox = tk.Checkbutton(qualifications_frame, text=qual, variable=var)
             checkbox.pack(anchor="w")
@@ -439,9 +285,7 @@ def assign_qualifications():
     def on_sailor_select(event):
         """Loads the qualifications of the selected sailor when the selection changes."""
         try:
-            selection = sailor_listbox.curselection()[0]
-            last_name = sailor_listbox.get(selection).split()[1]
-            sailor_qualifications = get_sailor_qualifications(last_name)
+            sailor_qualifications = get_sailor_qualifications(sailor_ids[sailor_listbox.curselection()[0]])
             
             # Update checkboxes
             for qual, var in checkboxes.items():
@@ -455,10 +299,10 @@ def assign_qualifications():
     def save_qualifications_to_db():
         """Saves the selected qualifications to the sailor in the database."""
         try:
-            selection = sailor_listbox.curselection()[0]
-            last_name = sailor_listbox.get(selection).split()[1]
+            sailor_id = sailor_ids[sailor_listbox.curselection()[0]]
             selected_qualifications = [qual for qual, var in checkboxes.items() if var.get()]
-            update_sailor_qualifications(last_name, selected_qualifications)
+            update_sailor_qualifications(sailor_id, selected_qualifications)
+            resolve_saved_watchbills_and_report(datetime.now().date())
             
             # Update the status_label and schedule timeout
             status_label.config(text="Qualifications saved")
@@ -477,8 +321,10 @@ def assign_qualifications():
     sailor_listbox.bind("<<ListboxSelect>>", on_sailor_select)
 
     # --- Update listbox with sailor names from the database ---
-    for rank, last_name, _ in get_sailors():
+    sailor_ids = []  # Sailor id of each listbox row
+    for sailor_id, rank, last_name, _ in get_sailors():
         sailor_listbox.insert(tk.END, f"{rank} {last_name}")
+        sailor_ids.append(sailor_id)
 
     # --- Qualifications Frame ---
     qualifications_frame = tk.Frame(assign_window)
@@ -499,7 +345,7 @@ def assign_qualifications():
 def manage_watchstations():
     """Opens a new window to manage watch stations."""
 
-    def add_watchstation():
+    def add_watchstation_to_db():
         """Adds a new watch station to the database."""
         station_name = station_entry.get()
         if not station_name:
@@ -507,32 +353,25 @@ def manage_watchstations():
             return  # Exit early if no name is entered
 
         try:
-            # Get the next display order
-            cursor.execute("SELECT MAX(display_order) FROM watchstations")
-            max_order = cursor.fetchone()[0]
-            new_order = max_order + 1 if max_order is not None else 0 # Handle empty table
-
-            cursor.execute("INSERT INTO watchstations (name, display_order) VALUES (?, ?)", (station_name, new_order))
-            conn.commit()
+            add_watchstation(station_name)  # Goes to the end of the display order
             update_watchstation_list()  # Update the Listbox after adding
             station_entry.delete(0, tk.END)  # Clear the entry field
         except sqlite3.IntegrityError:
             messagebox.showwarning("Duplicate Entry", "This watch station already exists.")
 
-    def remove_watchstation():
+    def remove_watchstation_from_db():
         """Removes the selected watch station from the database."""
         try:
             selection = watchstation_listbox.curselection()[0]
             station_name = watchstation_listbox.get(selection)
-            cursor.execute("DELETE FROM watchstations WHERE name=?", (station_name,))
-            conn.commit()
+            remove_watchstation(station_name)
             update_watchstation_list()  # Update Listbox after removing
             update_display_order()  # Fix display order after removal
 
         except IndexError:
             messagebox.showwarning("No Selection", "Please select a watch station to remove.")
 
-    def rename_watchstation():
+    def rename_watchstation_in_db():
         """Renames the selected watch station."""
         try:
             selection = watchstation_listbox.curselection()[0]
@@ -546,10 +385,10 @@ def manage_watchstations():
                     return
 
                 try:
-                    cursor.execute("UPDATE watchstations SET name=? WHERE name=?", (new_name, old_name))
-                    conn.commit()
+                    rename_watchstation(old_name, new_name)
                     update_watchstation_list()  # Update the Listbox after renaming
                     rename_window.destroy()
+                    resolve_saved_watchbills_and_report(datetime.now().date())  # Its sailors may not qualify for the new name
                 except sqlite3.IntegrityError:
                     messagebox.showwarning("Duplicate Entry", "This watch station already exists.")
 
@@ -592,17 +431,13 @@ def manage_watchstations():
 
     def update_display_order():
         """Updates the display_order in the database to match the listbox order."""
-        order = list(watchstation_listbox.get(0, tk.END))
-        for index, station_name in enumerate(order):
-            cursor.execute("UPDATE watchstations SET display_order = ? WHERE name = ?", (index, station_name))
-        conn.commit()
+        set_watchstation_order(watchstation_listbox.get(0, tk.END))
 
 
     def update_watchstation_list():
         watchstation_listbox.delete(0, tk.END)
-        cursor.execute("SELECT name FROM watchstations ORDER BY display_order")
-        for row in cursor.fetchall():
-            watchstation_listbox.insert(tk.END, row[0])
+        for station_name in get_watchstations():
+            watchstation_listbox.insert(tk.END, station_name)
 
     # Create the watch station management window
     watchstation_window = tk.Toplevel(root)
@@ -619,10 +454,10 @@ def manage_watchstations():
     update_watchstation_list()  # Initialize listbox with data from the database
 
     # --- Buttons ---
-    add_button = tk.Button(watchstation_window, text="Add", command=add_watchstation)
+    add_button = tk.Button(watchstation_window, text="Add", command=add_watchstation_to_db)
     add_button.grid(row=2, column=0, pady=10)
 
-    remove_button = tk.Button(watchstation_window, text="Remove", command=remove_watchstation)
+    remove_button = tk.Button(watchstation_window, text="Remove", command=remove_watchstation_from_db)
     remove_button.grid(row=2, column=1, pady=10)
     
 
@@ -632,14 +467,14 @@ def manage_watchstations():
     move_down_button = tk.Button(watchstation_window, text="Move Down", command=move_watchstation_down)
     move_down_button.grid(row=4, column=1, pady=5)
 
-    rename_button = tk.Button(watchstation_window, text="Rename", command=rename_watchstation)
+    rename_button = tk.Button(watchstation_window, text="Rename", command=rename_watchstation_in_db)
     rename_button.grid(row=5, column=0, columnspan=2, pady=5)
 
 
 def manage_watch_times():
     """Opens a new window to manage watch times."""
 
-    def add_watch_time():
+    def add_watch_time_to_db():
         start_time = start_time_entry.get()
         end_time = end_time_entry.get()
 
@@ -648,25 +483,25 @@ def manage_watch_times():
             return
 
         try:
-            cursor.execute("INSERT INTO watch_times (start_time, end_time) VALUES (?, ?)", (start_time, end_time))
-            conn.commit()
+            add_watch_time(start_time, end_time)
             update_watch_time_list()
             start_time_entry.delete(0, tk.END)
             end_time_entry.delete(0, tk.END)
 
+        except ValueError as e:  # Times that cannot be read as a clock time
+            messagebox.showwarning("Invalid Time", str(e))
         except sqlite3.IntegrityError:  # Handle potential duplicate entry errors
             messagebox.showwarning("Error", "A watch time with these start and/or end times already exists.")
 
 
 
-    def remove_watch_time():
+    def remove_watch_time_from_db():
         try:
             selection = watch_times_listbox.curselection()[0]
             watch_time_string = watch_times_listbox.get(selection)
             watch_time_id = int(watch_time_string.split(" - ")[0]) # Extract ID correctly
 
-            cursor.execute("DELETE FROM watch_times WHERE id=?", (watch_time_id,))
-            conn.commit()
+            remove_watch_time(watch_time_id)
             update_watch_time_list()
 
         except IndexError:
@@ -676,7 +511,7 @@ def manage_watch_times():
     def rename_watch_time():
         try:
             selection = watch_times_listbox.curselection()[0]
-            watch_time_id = watch_times_listbox.get(selection)[0]
+            watch_time_id = int(watch_times_listbox.get(selection).split(" - ")[0])
 
             def save_rename():
                 new_start = rename_start_entry.get()
@@ -685,11 +520,12 @@ def manage_watch_times():
                     messagebox.showwarning("Missing Information", "Enter both start and end times.")
                     return
                 try:
-                    cursor.execute("UPDATE watch_times SET start_time=?, end_time=? WHERE id=?", (new_start, new_end, watch_time_id))
-                    conn.commit()
+                    edit_watch_time(watch_time_id, new_start, new_end)
                     update_watch_time_list()
                     rename_window.destroy()
 
+                except ValueError as e:
+                    messagebox.showwarning("Invalid Time", str(e))
                 except sqlite3.IntegrityError:
                     messagebox.showwarning("Error", "A watch time with these times already exists.")
 
@@ -714,23 +550,10 @@ def manage_watch_times():
 
     def update_watch_time_list():
         watch_times_listbox.delete(0, tk.END)
-        cursor.execute("SELECT id, start_time, end_time FROM watch_times")
-        for _id, start, end in cursor.fetchall():
+        for _id, start, end in get_watch_times():
             watch_times_listbox.insert(tk.END, f"{_id} - {start} - {end}")
 
 
-
-    # --- Create watch times table if it doesn't exist ---
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS watch_times (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            start_time TEXT,
-            end_time TEXT,
-            UNIQUE(start_time, end_time)  -- Prevent duplicate entries
-        )
-    ''')
-    conn.commit()
-
     # --- Watch Times Window Setup ---
     watch_times_window = tk.Toplevel(root)
     watch_times_window.title("Manage Watch Times")
@@ -744,7 +567,7 @@ def manage_watch_times():
     end_time_entry = tk.Entry(watch_times_window)
     end_time_entry.grid(row=1, column=1)
 
-    add_button = tk.Button(watch_times_window, text="Add", command=add_watch_time)
+    add_button = tk.Button(watch_times_window, text="Add", command=add_watch_time_to_db)
     add_button.grid(row=2, column=0, columnspan=2, pady=(10, 0)) # Add pady
 
 
@@ -753,175 +576,228 @@ def manage_watch_times():
 
     update_watch_time_list()
 
-    remove_button = tk.Button(watch_times_window, text="Remove", command=remove_watch_time)
+    remove_button = tk.Button(watch_times_window, text="Remove", command=remove_watch_time_from_db)
     remove_button.grid(row=4, column=0, pady=10)
 
     rename_button = tk.Button(watch_times_window, text="Rename", command=rename_watch_time)
     rename_button.grid(row=4, column=1, pady=10)
 
-import random
-import tkinter as tk
-from tkinter import ttk
-from tkinter import messagebox
-from tkcalendar import DateEntry
-import sqlite3
-from datetime import datetime
-
-# ... (your existing database setup and other functions) ...
-
 def generate_watchbill():
     """Generates and displays the watchbill."""
+    from tkcalendar import DateEntry  # Imported on first use to keep startup fast
 
     try:
         def create_watchbill(selected_date):
             """Generates the watchbill data for the selected date."""
+            create_watchbill_range(selected_date, selected_date)
+
+        def create_watchbill_range(start_date, end_date):
+            """Generates one watchbill per day, loading the roster and leave only once."""
             try:
-                cursor.execute("SELECT name FROM watchstations ORDER BY display_order")
-                watchstations = [row[0] for row in cursor.fetchall()]
+                if end_date < start_date:
+                    messagebox.showwarning("Invalid Dates", "End date must not be before start date.")
+                    return
 
-                cursor.execute("SELECT start_time, end_time FROM watch_times")
-                watchtimes = cursor.fetchall()
+                profiler = watchbill_profile.profiler_from_env()  # Set WATCHBILL_PROFILE to time each run
+                timed = watchbill_profile.phase_timer(profiler)
+                with timed("load"):
+                    watchstations, watchtimes, sailors, leaves = get_watchbill_inputs(start_date, end_date)
 
                 if not watchstations or not watchtimes:
                     messagebox.showwarning("Missing Data", "Add watch stations and times.")
                     return
 
-                cursor.execute("SELECT s.last_name, l.start_date, l.end_date FROM leaves l JOIN sailors s ON l.sailor_id = s.id")
-                leaves = cursor.fetchall()
-
-                sailors_on_leave = []
-                for last_name, start_date, end_date in leaves:
-                    start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-                    end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-                    if start_date <= selected_date <= end_date:
-                        sailors_on_leave.append(last_name)
-
-                cursor.execute(
-                    "SELECT last_name, qualifications FROM sailors WHERE last_name NOT IN ({})".
-                    format(','.join(['?'] * len(sailors_on_leave))), sailors_on_leave)
-                sailors = cursor.fetchall()
-
-                sailor_data = {}
-                for rank, last_name, _ in get_sailors():
-                    sailor_data[last_name] = f"{rank} {last_name}"
-
-                watchbill_data = {}
-                assigned_ood = set()
-
-                for station in watchstations:
-                    watchbill_data[station] = {}
-                    if station not in ("OOD", "Internal Rover"):  # Prioritize same sailor for other stations
-                        qualified_sailors = []
-                        for last_name, qualifications in sailors:
-                            if qualifications:
-                                sailor_quals = qualifications.split(',')
-                                if any(station == qual or (station.startswith(qual) and station[len(qual):].isdigit()) for qual in sailor_quals):
-                                    if last_name not in assigned_ood:
-                                        qualified_sailors.append(last_name)
-
-                        if qualified_sailors:
-                            chosen_sailor = random.choice(qualified_sailors)
-                            for start, end in watchtimes:
-                                watchbill_data[station][f"{start} - {end}"] = sailor_data.get(chosen_sailor, "CLICK TO ASSIGN")
-                        else:
-                            for start, end in watchtimes:
-                                watchbill_data[station][f"{start} - {end}"] = "CLICK TO ASSIGN"
-                    else:
-                        for start, end in watchtimes:
-                            qualified_sailors = []  # Find qualified sailors *inside* the loop
-                            for last_name, qualifications in sailors:
-                                if qualifications:
-                                    sailor_quals = qualifications.split(',')
-                                    if any(station == qual or (station.startswith(qual) and station[len(qual):].isdigit()) for qual in sailor_quals):
-                                        if station == "OOD":
-                                            if last_name not in assigned_ood:
-                                                qualified_sailors.append(last_name)
-                                        # Add this condition for Internal Rover:
-                                        elif station == "Internal Rover": 
-                                            qualified_sailors.append(last_name)  # No OOD check needed
-                                        elif last_name not in assigned_ood:
-                                            qualified_sailors.append(last_name)
-
-
-                            if qualified_sailors:
-                                chosen_sailor = random.choice(qualified_sailors)
-                                watchbill_data[station][f"{start} - {end}"] = sailor_data.get(chosen_sailor, "CLICK TO ASSIGN")
-                                if station == "OOD":
-                                    assigned_ood.add(chosen_sailor)  # Add only for OOD
-                            else:
-                                watchbill_data[station][f"{start} - {end}"] = "CLICK TO ASSIGN"  # Handle the case with no qualified sailors
-
-                # Display Watchbill (in Treeview)
-                display_watchbill(selected_date, watchbill_data, watchstations, watchtimes)  # Call new function
-
-            except Exception as e:
-                messagebox.showerror("Error", f"Watchbill generation error: {e}")
-
-        def display_watchbill(selected_date, watchbill_data, watchstations, watchtimes):
-            """Displays the watchbill data in a Treeview.""" # New function to handle display logic
-            watchbill_window = tk.Toplevel(root)
-            watchbill_window.title(f"Watchbill - {selected_date.strftime('%Y-%m-%d')}")
-
-            watchbill_tree = ttk.Treeview(
-                watchbill_window,
-                columns=["Watch Station"] + [f"{start} - {end}" for start, end in watchtimes],
-                show="headings"
-            )
-            watchbill_tree.heading("Watch Station", text="Watch Station")
-            for start, end in watchtimes:
-                watchbill_tree.heading(f"{start} - {end}", text=f"{start} - {end}")
-
-            for station in watchstations:
-                values = [station] + [watchbill_data[station].get(f"{start} - {end}", "") for start, end in watchtimes]
-                watchbill_tree.insert("", tk.END, values=values)
-
-            def on_double_click(event):
-                """Handles double-click on a Treeview cell to assign a sailor."""
-                rowid = watchbill_tree.identify_row(event.y)
-                colid = watchbill_tree.identify_column(event.x)
-
-                if rowid and colid and colid != '#0':  # Check for valid row and column (not the heading)
-                    try:
-                        time_index = int(colid[1:]) - 2  # colid starts from #1
-                        if 0 <= time_index < len(watchtimes):
-                            start_time, end_time = watchtimes[time_index]
-                            station = watchbill_tree.item(rowid)['values'][0]  # Get the station name
-
-                            def select_sailor(sailor_info):
-                                """Assigns the selected sailor to the watch station and time."""
-                                rank, sailor_name = sailor_info
-                                full_name = f"{rank} {sailor_name}"
-                                watchbill_data[station][f"{start_time} - {end_time}"] = full_name
-                                watchbill_tree.set(rowid, colid, full_name)  # Update Treeview
-                                sailor_select_window.destroy()
-
-                            # --- Sailor Selection Window ---
-                            sailor_select_window = tk.Toplevel(watchbill_window)
-                            sailor_select_window.title("Select Sailor")
-
-                            sailor_listbox = tk.Listbox(sailor_select_window)
-                            qualified_sailors = []
-
-                            for rank, last_name, quals in get_sailors():
-                                if quals:
-                                    sailor_quals = quals.split(',')
-                                    if any(station == qual or (station.startswith(qual) and station[len(qual):].isdigit()) for qual in sailor_quals):
-                                        display_string = f"{rank} {last_name}"
-                                        sailor_listbox.insert(tk.END, display_string)
-                                        qualified_sailors.append((rank, last_name))  # Store rank and name
-
-                            sailor_listbox.pack(fill=tk.BOTH, expand=True)
-                            sailor_listbox.bind("<Double-Button-1>", lambda event: select_sailor(qualified_sailors[sailor_listbox.curselection()[0]]))
+                try:
+                    optimize_ms = int(optimize_entry.get() or 0)
+                except ValueError:
+                    messagebox.showwarning("Invalid Time", "Optimize time must be a whole number of milliseconds.")
+                    return
 
-                    except (IndexError, ValueError) as e:
-                        print(f"Error handling double-click: {e}")
+                try:
+                    candidates = max(1, int(candidates_entry.get() or 1))
+                except ValueError:
+                    messagebox.showwarning("Invalid Candidates", "Candidates must be a whole number.")
+                    return
 
+                saved_dates = get_saved_watchbill_dates(start_date, end_date)
+                if saved_dates and not messagebox.askyesno(
+                        "Replace Saved Watchbills",
+                        f"{len(saved_dates)} day(s) in this range already have a saved watchbill "
+                        f"(first: {saved_dates[0]}). Replace them, including manual edits?"):
+                    return
 
-                pass  # Replace this with your code
+                if profiler is not None:
+                    profiler.start()
+                with timed("eligibility"):
+                    eligibility = get_eligibility_index(watchstations, sailors)
+                with timed("load"):
+                    tally = watchbill_engine.WorkloadTally.from_history(get_watch_history(start_date))
+                options = dict(eligibility=eligibility, optimize_ms=optimize_ms, tally=tally)
+                if candidates > 1:
+                    from watchbill_optimizer import format_breakdown, generate_best_watchbills
+
+                def generate_bills():
+                    """Runs on the worker thread: pure generation, no Tk and no database."""
+                    with watchbill_profile.thread_profile(profiler):
+                        if candidates > 1:
+                            # Best of N candidates, generated across all CPU cores
+                            best = generate_best_watchbills(start_date, end_date, watchstations, watchtimes, sailors,
+                                                            leaves, candidates=candidates, **options)
+                            if profiler is not None:
+                                best = profiler.iterate("assignment", best)
+                            for day, watchbill_data, breakdown in best:
+                                yield day, watchbill_data, format_breakdown(breakdown)
+                        else:
+                            for day, watchbill_data in watchbill_engine.create_watchbills(
+                                    start_date, end_date, watchstations, watchtimes, sailors, leaves,
+                                    profiler=profiler, **options):
+                                yield day, watchbill_data, None
+
+                # Display Watchbill (in a grid) as each day arrives, one tab per day for a range
+                total_days = (end_date - start_date).days + 1
+                days_shown = 0
+                result_window = None  # Where the timing summary goes when profiling
+                if start_date != end_date:
+                    range_window = tk.Toplevel(root)
+                    range_window.title(f"Watchbills - {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
+                    notebook = ttk.Notebook(range_window)
+                    notebook.pack(fill=tk.BOTH, expand=True)
+                    result_window = range_window
+
+                def show_bill(bill):
+                    """Runs on the Tk thread for each generated day: save it, then show it."""
+                    nonlocal days_shown, result_window
+                    day, watchbill_data, score = bill
+                    with timed("save"):
+                        save_watchbill(day, watchbill_data)
+                    with timed("render"):
+                        if start_date == end_date:
+                            result_window = display_watchbill(day, watchbill_data, watchstations, watchtimes,
+                                                                sailors, score=score)
+                        else:
+                            day_frame = tk.Frame(notebook)
+                            notebook.add(day_frame, text=day.strftime('%d %b'))
+                            display_watchbill(day, watchbill_data, watchstations, watchtimes, sailors,
+                                              parent=day_frame, score=score)
+                    days_shown += 1
+                    progress.update_progress(days_shown, f"Generated {day.strftime('%d %b %Y')} "
+                                                         f"({days_shown} of {total_days})")
+
+                def finished(cancelled, error):
+                    progress.destroy()
+                    if profiler is not None:
+                        profiler.stop()
+                        profiler.report(f"watchbill {start_date} to {end_date}")
+                        if result_window is not None:
+                            tk.Label(result_window, text=f"Timings: {profiler.summary()}", fg="gray").pack(pady=5)
+                    if error is not None:
+                        messagebox.showerror("Error", f"Watchbill generation error: {error}")
+                    elif cancelled:
+                        messagebox.showinfo("Generation Cancelled",
+                                            f"Stopped after {days_shown} of {total_days} day(s); "
+                                            "the days already shown have been saved.")
+
+                # Polled from root, so closing the date window does not orphan the run
+                task = watchbill_widgets.BackgroundTask(root, generate_bills, show_bill, finished)
+                progress = watchbill_widgets.ProgressDialog(root, "Generating Watchbills", total_days,
+                                                            on_cancel=task.cancel)
+                task.start()
 
+            except Exception as e:
+                messagebox.showerror("Error", f"Watchbill generation error: {e}")
 
-            watchbill_tree.bind("<Double-Button-1>", on_double_click)
-            watchbill_tree.pack()
+        def open_saved_watchbill(selected_date):
+            """Reopens a saved watchbill without regenerating it."""
+            watchbill_data = load_watchbill(selected_date)
+            if watchbill_data is None:
+                messagebox.showinfo("No Saved Watchbill", f"No watchbill has been saved for {selected_date.strftime('%Y-%m-%d')}.")
+                return
+            watchstations, watchtimes, sailors = get_roster_inputs()
+            display_watchbill(selected_date, watchbill_data, watchstations, watchtimes, sailors)
+
+        def export_saved_watchbills(start_date, end_date):
+            """Exports the saved watchbills from start_date through end_date to CSV, XLSX, PDF or PNG."""
+            end_date = max(start_date, end_date)
+            path = filedialog.asksaveasfilename(
+                title="Export Watchbills", defaultextension=".pdf",
+                initialfile=f"watchbill-{start_date.strftime('%Y-%m-%d')}",
+                filetypes=[("PDF", "*.pdf"), ("Excel workbook", "*.xlsx"), ("CSV", "*.csv"), ("PNG, one per day", "*.png")])
+            if not path:
+                return
+            try:
+                _, watchtimes, sailors = get_roster_inputs()
+                count = watchbill_export.export_watchbills(path, iter_saved_watchbills(start_date, end_date),
+                                                           watchtimes, sailors)
+            except (ValueError, ImportError, OSError) as e:
+                messagebox.showerror("Export Failed", str(e))
+                return
+            if count:
+                messagebox.showinfo("Export Complete", f"Exported {count} watchbill(s) to {path}.")
+            else:
+                messagebox.showinfo("Nothing to Export", "No watchbills have been saved in that range.")
+
+        def display_watchbill(selected_date, watchbill_data, watchstations, watchtimes, sailors, parent=None, score=None):
+            """Displays the watchbill data in a grid, in its own window unless a parent frame is given.
+
+            The grid only draws the cells in view, so large bills open as fast as
+            small ones. Manual edits are written straight back to the saved
+            watchbill. score is an optional summary line (from best-of-N
+            generation) shown under the table.
+            """
+            if parent is None:
+                watchbill_window = tk.Toplevel(root)
+                watchbill_window.title(f"Watchbill - {selected_date.strftime('%Y-%m-%d')}")
+            else:
+                watchbill_window = parent
+
+            # Who holds which watch, cell by cell, so the pick list can skip anyone already on an overlapping watch
+            time_keys = [watchbill_engine.watch_time_key(start, end) for start, end, *_ in watchtimes]
+            occupancy = watchbill_engine.Occupancy(watchbill_engine.split_units(watchbill_data, time_keys, by_cell=True),
+                                                   len(time_keys), watchbill_engine.slot_overlaps(watchtimes))
+
+            display_data = watchbill_engine.format_watchbill(watchbill_data, sailors)
+            rows = [[station] + [display_data.get(station, {}).get(key, watchbill_engine.UNASSIGNED) for key in time_keys]
+                    for station in watchstations]
+            on_leave = None  # Sailors on leave that day, loaded the first time the pick list opens
+
+            def on_double_click(row, column):
+                """Opens the pick list for a cell; only sailors qualified, present and free for that watch are offered."""
+                nonlocal on_leave
+                time_index = column - 1
+                if not 0 <= time_index < len(watchtimes):
+                    return  # The station column
+                start_time, end_time = watchtimes[time_index][:2]
+                station = watchstations[row]
+                unit = (station, time_index)
+                occupancy.holder.setdefault(unit, None)
+                if on_leave is None:
+                    on_leave = get_sailors_on_leave(selected_date)
+
+                eligibility = get_eligibility_index()
+                choices = []
+                for sailor_id in eligibility.eligible(station):
+                    if sailor_id in on_leave:
+                        continue
+                    if any(other[0] != station or station == "OOD" for other in occupancy.blockers(sailor_id, unit)):
+                        continue  # Already on an overlapping watch elsewhere (or a second OOD)
+                    choices.append((eligibility.names[sailor_id], sailor_id))
+
+                def select_sailor(sailor_id):
+                    """Assigns the selected sailor to the watch station and time."""
+                    watchbill_data.setdefault(station, {})[time_keys[time_index]] = sailor_id
+                    occupancy.move(unit, sailor_id)
+                    save_assignment(selected_date, station, start_time, end_time, sailor_id)
+                    watchbill_grid.set(row, column, eligibility.names[sailor_id])
+
+                watchbill_widgets.SailorPicker(watchbill_window, choices, select_sailor,
+                                               title=f"Select Sailor - {station} {time_keys[time_index]}")
+
+            watchbill_grid = watchbill_widgets.VirtualGrid(watchbill_window, ["Watch Station"] + time_keys, rows,
+                                                           on_double_click=on_double_click)
+            watchbill_grid.pack(fill=tk.BOTH, expand=True)
+            if score:
+                tk.Label(watchbill_window, text=score.capitalize()).pack(pady=5)
+            return watchbill_window
 
 
 
@@ -933,9 +809,34 @@ def generate_watchbill():
         date_entry = DateEntry(date_window, width=12, background='darkblue', foreground='white', borderwidth=2)
         date_entry.pack(pady=5)
 
+        tk.Label(date_window, text="Optimize (ms per day, 0 = off):").pack(pady=5)
+        optimize_entry = tk.Entry(date_window, width=8)
+        optimize_entry.insert(0, "200")
+        optimize_entry.pack(pady=5)
+
+        tk.Label(date_window, text="Candidates (best of N, uses all CPU cores):").pack(pady=5)
+        candidates_entry = tk.Entry(date_window, width=8)
+        candidates_entry.insert(0, "1")
+        candidates_entry.pack(pady=5)
+
         select_button = tk.Button(date_window, text="Select", command=lambda: create_watchbill(date_entry.get_date()))
         select_button.pack(pady=5)
 
+        tk.Label(date_window, text="Through Date (range):").pack(pady=5)
+        end_date_entry = DateEntry(date_window, width=12, background='darkblue', foreground='white', borderwidth=2)
+        end_date_entry.pack(pady=5)
+
+        range_button = tk.Button(date_window, text="Generate Range",
+                                 command=lambda: create_watchbill_range(date_entry.get_date(), end_date_entry.get_date()))
+        range_button.pack(pady=5)
+
+        open_button = tk.Button(date_window, text="Open Saved", command=lambda: open_saved_watchbill(date_entry.get_date()))
+        open_button.pack(pady=5)
+
+        export_button = tk.Button(date_window, text="Export Saved",
+                                  command=lambda: export_saved_watchbills(date_entry.get_date(), end_date_entry.get_date()))
+        export_button.pack(pady=5)
+
     except Exception as e:
         messagebox.showerror("Error", f"An error occurred: {e}")
 
@@ -943,12 +844,11 @@ def generate_watchbill():
 
 def manage_leave():
     """Opens a new window to manage Leave/Availability."""
+    from tkcalendar import DateEntry  # Imported on first use to keep startup fast
 
     def add_leave_to_db():
         try:
-            selection = sailor_listbox.curselection()[0]
-            last_name = sailor_listbox.get(selection).split()[1]
-            sailor_id = get_sailor_id(last_name)
+            sailor_id = sailor_ids[sailor_listbox.curselection()[0]]
 
             start_date = start_date_entry.get_date()
             end_date = end_date_entry.get_date()
@@ -964,6 +864,7 @@ def manage_leave():
                 return
 
             add_leave(sailor_id, start_date, end_date, leave_type, notes)
+            resolve_saved_watchbills_and_report(start_date, end_date)
             update_leave_list()
             clear_entries()
 
@@ -986,46 +887,11 @@ def manage_leave():
         notes_entry.delete("1.0", tk.END)
 
     def update_leave_list():
+        """Lists the leave overlapping the Show From/To window, in the chosen order."""
         leave_listbox.delete(0, tk.END)
-        
-        # Calculate spacing (adjust these values as needed)
-        id_spacing = 5
-        rank_spacing = 5
-        name_spacing = 15
-        date_spacing = 15
-        type_spacing = 15
-        notes_spacing = 30  # Adjust as needed for longer notes
-
-        # Create the header string
-        header_string = (
-            f"{'ID':<{id_spacing}}"  # Add the ID column header back
-            f"{'RANK':<{rank_spacing}}"
-            f"{'NAME':<{name_spacing}}"
-            f"{'START DATE':<{date_spacing}}"
-            f"{'END DATE':<{date_spacing}}"
-            f"{'TYPE':<{type_spacing}}"
-            f"{'NOTES':<{notes_spacing}}"
-    )
-
-        leave_listbox.insert(tk.END, header_string)  # Insert the header
-
-        for leave_id, last_name, start_date, end_date, leave_type, notes, rank in get_leaves():
-            formatted_start_date = datetime.strptime(start_date, "%Y-%m-%d").strftime("%d %b %Y")
-            formatted_end_date = datetime.strptime(end_date, "%Y-%m-%d").strftime("%d %b %Y")
-
-            # Format the string with fixed-width font and spacing
-            entry_string = (
-                f"{leave_id:<{id_spacing}}"  # Include the leave_id in the display
-                f"{rank:<{rank_spacing}}"
-                f"{last_name:<{name_spacing}}"
-                f"{formatted_start_date:<{date_spacing}}"
-                f"{formatted_end_date:<{date_spacing}}"
-                f"{leave_type:<{type_spacing}}"
-                f"{notes:<{notes_spacing}}"
-            )
-
-            leave_listbox.insert(tk.END, entry_string)
-            leave_listbox.config(font="Courier")  # Set the font to Courier
+        leaves = get_leaves(show_from_entry.get_date(), show_to_entry.get_date(), LEAVE_SORT_OPTIONS[sort_by.get()])
+        leave_listbox.insert(tk.END, *watchbill_export.leave_list_lines(leaves))  # Header first
+        leave_listbox.config(font="Courier")  # Fixed width, so the columns line up
 
     def edit_leave_in_db():
         try:
@@ -1033,11 +899,7 @@ def manage_leave():
             leave_id = int(leave_listbox.get(selection).split()[0])  # Get leave ID
 
             # Fetch existing leave details from the database
-            cursor.execute("SELECT l.start_date, l.end_date, l.type, l.notes, s.last_name "
-                           "FROM leaves l "
-                           "JOIN sailors s ON l.sailor_id = s.id "
-                           "WHERE l.id=?", (leave_id,))
-            start_date, end_date, leave_type, notes, last_name = cursor.fetchone()
+            start_date, end_date, leave_type, notes, last_name = get_leave(leave_id)
 
             def save_changes_to_db():
                 new_start_date = edit_start_date_entry.get_date()
@@ -1050,6 +912,7 @@ def manage_leave():
                     return
 
                 edit_leave(leave_id, new_start_date, new_end_date, new_leave_type, new_notes)
+                resolve_saved_watchbills_and_report(new_start_date, new_end_date)
                 update_leave_list()
                 edit_window.destroy()
 
@@ -1090,8 +953,10 @@ def manage_leave():
     sailor_listbox.pack(side="left", fill="y", padx=10, pady=10)
 
     # --- Update listbox with sailor names from the database ---
-    for rank, last_name, _ in get_sailors():
+    sailor_ids = []  # Sailor id of each listbox row
+    for sailor_id, rank, last_name, _ in get_sailors():
         sailor_listbox.insert(tk.END, f"{rank} {last_name}")
+        sailor_ids.append(sailor_id)
 
     # --- Leave Details Frame ---
     leave_details_frame = tk.Frame(leave_window)
@@ -1113,47 +978,97 @@ def manage_leave():
     notes_entry = tk.Text(leave_details_frame, height=5, width=20)
     notes_entry.grid(row=3, column=1)
 
+    # --- Which leave to list: only the window shown is read from the database ---
+    filter_frame = tk.Frame(leave_details_frame)
+    filter_frame.grid(row=4, column=0, columnspan=2, pady=(10, 0))
+    today = datetime.now().date()
+    tk.Label(filter_frame, text="Show From:").pack(side="left")
+    show_from_entry = DateEntry(filter_frame, width=12, background='darkblue', foreground='white', borderwidth=2)
+    show_from_entry.set_date(today - timedelta(days=LEAVE_LIST_PAST_DAYS))
+    show_from_entry.pack(side="left", padx=(0, 10))
+    tk.Label(filter_frame, text="To:").pack(side="left")
+    show_to_entry = DateEntry(filter_frame, width=12, background='darkblue', foreground='white', borderwidth=2)
+    show_to_entry.set_date(today + timedelta(days=LEAVE_LIST_FUTURE_DAYS))
+    show_to_entry.pack(side="left", padx=(0, 10))
+    tk.Label(filter_frame, text="Sort By:").pack(side="left")
+    sort_by = tk.StringVar(value=next(iter(LEAVE_SORT_OPTIONS)))
+    tk.OptionMenu(filter_frame, sort_by, *LEAVE_SORT_OPTIONS, command=lambda _: update_leave_list()).pack(side="left")
+    show_from_entry.bind("<<DateEntrySelected>>", lambda event: update_leave_list())
+    show_to_entry.bind("<<DateEntrySelected>>", lambda event: update_leave_list())
+
     # --- Leave Listbox ---
     leave_listbox = tk.Listbox(leave_details_frame, width=100)
-    leave_listbox.grid(row=4, column=0, columnspan=2, pady=10)
+    leave_listbox.grid(row=5, column=0, columnspan=2, pady=10)
     update_leave_list()
 
     # --- Buttons ---
     add_button = tk.Button(leave_details_frame, text="Add Leave", command=add_leave_to_db)
-    add_button.grid(row=5, column=0, pady=10)
+    add_button.grid(row=6, column=0, pady=10)
 
     remove_button = tk.Button(leave_details_frame, text="Remove Leave", command=remove_leave_from_db)
-    remove_button.grid(row=5, column=1, pady=10)
+    remove_button.grid(row=6, column=1, pady=10)
 
     edit_button = tk.Button(leave_details_frame, text="Edit Leave", command=edit_leave_in_db)
-    edit_button.grid(row=6, column=0, columnspan=2, pady=10)  # Added edit button
+    edit_button.grid(row=7, column=0, columnspan=2, pady=10)  # Added edit button
+
+def import_roster():
+    """Bulk imports sailors, qualification assignments and leave from CSV or XLSX files."""
+    paths = filedialog.askopenfilenames(
+        title="Import Sailors, Qualifications and Leave",
+        filetypes=[("CSV or Excel", "*.csv *.xlsx"), ("CSV", "*.csv"), ("Excel workbook", "*.xlsx")])
+    if not paths:
+        return
+    try:
+        counts = watchbill_import.import_roster(paths)
+    except (ValueError, ImportError, OSError) as e:  # RosterImportError lists every bad row with its line number
+        messagebox.showerror("Import Failed", str(e))
+        return
+    messagebox.showinfo("Import Complete",
+                        f"Imported {counts['sailors']} sailor(s), {counts['qualifications']} qualification "
+                        f"assignment(s) and {counts['leave']} leave row(s)."
+                        + (f"\n{counts['existing']} sailor(s) were already on the roster and were not added again."
+                           if counts["existing"] else ""))
+    if counts["leave_from"] is not None:
+        resolve_saved_watchbills_and_report(counts["leave_from"])
 
 def about():
     messagebox.showinfo("About", "Navy Inport Watchbill Generator\nVersion 1.0")
 
-# --- Menu Bar ---
-root = tk.Tk()
-root.title("Navy Inport Watchbill Generator")
+def main():
+    """Opens the database, builds the main window and runs the Tk event loop."""
+    global root
+
+    watchbill_db.connect()
+
+    # --- Menu Bar ---
+    root = tk.Tk()
+    root.title("Navy Inport Watchbill Generator")
+
+    menubar = tk.Menu(root)
+
+    # Personnel menu
+    personnelmenu = tk.Menu(menubar, tearoff=0)
+    personnelmenu.add_command(label="Manage Sailors", command=manage_sailors)
+    personnelmenu.add_command(label="Qualifications", command=manage_qualifications)
+    personnelmenu.add_command(label="Assign Qualifications", command=assign_qualifications)
+    personnelmenu.add_command(label="Leave/Availability", command=manage_leave)  # Updated command
+    personnelmenu.add_separator()
+    personnelmenu.add_command(label="Import from CSV/XLSX...", command=import_roster)
+    menubar.add_cascade(label="Personnel", menu=personnelmenu)
 
-menubar = tk.Menu(root)
+    # Watchbill menu
+    watchbillmenu = tk.Menu(menubar, tearoff=0)
+    watchbillmenu.add_command(label="Watch Stations", command=manage_watchstations)
+    watchbillmenu.add_command(label="Watch Times", command=manage_watch_times)
+    watchbillmenu.add_command(label="Generate Watchbill", command=generate_watchbill)
+    menubar.add_cascade(label="Watchbill", menu=watchbillmenu)
 
-# Personnel menu
-personnelmenu = tk.Menu(menubar, tearoff=0)
-personnelmenu.add_command(label="Manage Sailors", command=manage_sailors)
-personnelmenu.add_command(label="Qualifications", command=manage_qualifications)
-personnelmenu.add_command(label="Assign Qualifications", command=assign_qualifications)
-personnelmenu.add_command(label="Leave/Availability", command=manage_leave)  # Updated command
-menubar.add_cascade(label="Personnel", menu=personnelmenu)
+    root.config(menu=menubar)
 
-# Watchbill menu
-watchbillmenu = tk.Menu(menubar, tearoff=0)
-watchbillmenu.add_command(label="Watch Stations", command=manage_watchstations)
-watchbillmenu.add_command(label="Watch Times", command=manage_watch_times)
-watchbillmenu.add_command(label="Generate Watchbill", command=generate_watchbill)
-menubar.add_cascade(label="Watchbill", menu=watchbillmenu) 
+    root.mainloop()
 
-root.config(menu=menubar)
+    watchbill_db.db.close()  # Close the connection when the mainloop ends
 
-root.mainloop()  
 
-conn.close()  # Close the connection when the mainloop ends
+if __name__ == "__main__":
+    main()
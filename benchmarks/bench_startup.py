@@ -0,0 +1,74 @@
+"""Startup-time benchmark for the watchbill GUI module.
+
+Imports Watchbill-Generation.py (without opening a window) and opens a
+temporary database in a fresh interpreter, once on a fresh database and then
+repeatedly on one whose schema is already current. Fails if the median warm
+start exceeds --max-ms or if a lazily imported module was pulled in at startup.
+
+    python benchmarks/bench_startup.py --runs 10 --max-ms 400
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "Watchbill-Generation.py")
+LAZY_MODULES = ("tkcalendar", "matplotlib", "watchbill_optimizer")
+
+# Run in the child: time loading the module (run_name keeps main() from starting Tk)
+CHILD = """
+import runpy, sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+runpy.run_path({app!r}, run_name="watchbill_app")
+import watchbill_db
+watchbill_db.connect()  # What main() does before building the window
+elapsed = (time.perf_counter() - started) * 1000
+loaded = [name for name in {lazy!r} if name in sys.modules]
+print(elapsed, ",".join(loaded))
+"""
+
+
+def start_once(db_path):
+    """Returns (milliseconds to load the module, lazily imported modules that got loaded)."""
+    env = dict(os.environ, WATCHBILL_DB=db_path)
+    code = CHILD.format(root=ROOT, app=APP, lazy=LAZY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], env=env, cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout.splitlines()[-1].split()
+    return float(output[0]), (output[1].split(",") if len(output) > 1 else [])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="warm starts to time")
+    parser.add_argument("--max-ms", type=float, default=400.0, help="fail if the median warm start is slower")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "watchbill.db")
+        cold, loaded = start_once(db_path)
+        warm = []
+        for _ in range(args.runs):
+            elapsed, more = start_once(db_path)
+            warm.append(elapsed)
+            loaded += more
+
+    median = statistics.median(warm)
+    print(f"fresh database:  {cold:8.1f} ms")
+    print(f"current schema:  {median:8.1f} ms median, {min(warm):.1f} ms best over {args.runs} runs")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: imported at startup: {', '.join(sorted(set(loaded)))}")
+        failed = True
+    if median > args.max_ms:
+        print(f"FAIL: median start {median:.1f} ms is over the {args.max_ms:.0f} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
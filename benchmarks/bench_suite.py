@@ -0,0 +1,194 @@
+"""Benchmark suite for the generator and data layer on a synthetic roster.
+
+Builds a seeded roster (see synthetic.py), loads it into a temporary
+database and times generation, leave lookups and the data-access calls the
+windows make. Results can be saved as JSON and compared against a saved
+baseline, failing when anything has slowed down by more than --tolerance:
+
+    python benchmarks/bench_suite.py --json before.json
+    python benchmarks/bench_suite.py --compare before.json
+
+The defaults are a large ship: 1,000 sailors, 200 stations, 24 watches a day
+and 20,000 leave rows.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import synthetic  # noqa: E402
+import watchbill_engine  # noqa: E402
+import watchbill_export  # noqa: E402
+
+
+def time_call(func, repeat):
+    """Runs func once to warm up, then repeat times with the GC paused (as timeit does); returns milliseconds."""
+    func()
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            func()
+            times.append((time.perf_counter() - started) * 1000)
+        finally:
+            gc.enable()
+    return times
+
+
+def build_benchmarks(db, roster, args):
+    """Returns [(name, callable)] in the order they are run."""
+    watchstations, watchtimes = roster["watchstations"], roster["watchtimes"]
+    sailors = roster["sailors"]
+    leaves = [(sailor_id, start, end) for sailor_id, start, end, _, _ in roster["leaves"]]
+    start_date = args.start_date
+    end_date = start_date + timedelta(days=args.days - 1)
+    year = [start_date + timedelta(days=offset) for offset in range(365)]
+    leave_window = (start_date - timedelta(days=30), start_date + timedelta(days=180))  # The leave window's default
+    leave_index = watchbill_engine.LeaveIndex(leaves)
+    eligibility = watchbill_engine.EligibilityIndex(watchstations, sailors)
+    sailor_ids = [sailor_id for sailor_id, _, _, _ in sailors]
+
+    def generate(method):
+        def run():
+            for _ in watchbill_engine.create_watchbills(start_date, end_date, watchstations, watchtimes, sailors,
+                                                        leaves, rng=random.Random(args.seed), method=method,
+                                                        eligibility=eligibility):
+                pass
+        return run
+
+    def eligibility_build():
+        index = watchbill_engine.EligibilityIndex(watchstations, sailors)
+        for station in watchstations:
+            index.eligible(station)
+
+    def leave_lookup_by_day():
+        for day in year:
+            leave_index.unavailable_on(day)
+
+    def leave_lookup_by_sailor():
+        for day in year[::30]:
+            for sailor_id in sailor_ids:
+                leave_index.is_unavailable(sailor_id, day)
+
+    def inputs_and_generate_day():
+        # What one Generate Watchbill click costs: load everything, then solve one day
+        stations, times, roster_sailors, roster_leaves = db.get_watchbill_inputs(start_date, start_date)
+        db.invalidate_eligibility_index()
+        watchbill_engine.create_watchbill(start_date, stations, times, roster_sailors, roster_leaves,
+                                          rng=random.Random(args.seed),
+                                          eligibility=db.get_eligibility_index(stations, roster_sailors))
+
+    return [
+        (f"generate_matching_{args.days}d", generate("matching")),
+        (f"generate_greedy_{args.days}d", generate("greedy")),
+        ("generate_day_from_db", inputs_and_generate_day),
+        ("eligibility_index", eligibility_build),
+        ("leave_index_build", lambda: watchbill_engine.LeaveIndex(leaves)),
+        ("leave_lookup_365_days", leave_lookup_by_day),
+        ("leave_lookup_per_sailor", leave_lookup_by_sailor),
+        ("get_sailors", db.get_sailors),
+        ("get_leaves", db.get_leaves),
+        ("get_leaves_window", lambda: db.get_leaves(*leave_window)),
+        ("get_roster_inputs", db.get_roster_inputs),
+        ("get_watchbill_inputs", db.get_watchbill_inputs),
+        ("get_watchbill_inputs_range", lambda: db.get_watchbill_inputs(start_date, end_date)),
+        ("leave_list_refresh", lambda: watchbill_export.leave_list_lines(db.get_leaves(*leave_window))),
+    ]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sailors", type=int, default=1000)
+    parser.add_argument("--qualifications", type=int, default=40)
+    parser.add_argument("--stations", type=int, default=200)
+    parser.add_argument("--slots", type=int, default=24, help="watches per day")
+    parser.add_argument("--leave", type=int, default=20000, help="leave rows")
+    parser.add_argument("--quals-per-sailor", type=int, default=4)
+    parser.add_argument("--days", type=int, default=7, help="days to generate per run")
+    parser.add_argument("--start-date", type=watchbill_engine.parse_date, default=watchbill_engine.parse_date("2026-03-01"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark; the best is reported")
+    parser.add_argument("--only", help="comma-separated benchmark names to run")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="compare against results saved with --json")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown when comparing (0.25 = 25%%)")
+    parser.add_argument("--min-ms", type=float, default=1.0,
+                        help="ignore slowdowns smaller than this many milliseconds (timer noise)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    params = {name: getattr(args, name) for name in
+              ("sailors", "qualifications", "stations", "slots", "leave", "quals_per_sailor", "days", "seed")}
+    params["start_date"] = args.start_date.strftime('%Y-%m-%d')
+
+    roster = synthetic.make_roster(args.sailors, args.qualifications, args.stations, args.slots, args.leave,
+                                   quals_per_sailor=args.quals_per_sailor, start_date=args.start_date - timedelta(days=180),
+                                   seed=args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        import watchbill_db as db
+        db.connect(os.path.join(tmp, "watchbill.db"))
+        synthetic.populate_database(db.db.conn, roster)
+
+        benchmarks = build_benchmarks(db, roster, args)
+        if args.only:
+            wanted = set(args.only.split(","))
+            benchmarks = [(name, func) for name, func in benchmarks if name in wanted]
+
+        results = {}
+        print(f"{'benchmark':<28}{'best ms':>10}{'median ms':>12}")
+        for name, func in benchmarks:
+            times = time_call(func, args.repeat)
+            results[name] = {"best_ms": round(min(times), 3), "median_ms": round(statistics.median(times), 3)}
+            print(f"{name:<28}{min(times):>10.2f}{statistics.median(times):>12.2f}", flush=True)
+        db.db.close()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"params": params, "python": platform.python_version(), "results": results}, f, indent=2)
+
+    if args.compare:
+        return compare(args.compare, params, results, args.tolerance, args.min_ms)
+    return 0
+
+
+def compare(path, params, results, tolerance, min_ms):
+    """Prints the change against a saved baseline; returns 1 if anything regressed beyond tolerance."""
+    with open(path) as f:
+        baseline = json.load(f)
+    comparable = baseline["params"] == params
+    if not comparable:
+        print(f"warning: {path} was recorded with different parameters; timings are not comparable")
+    regressed = []
+    print(f"\n{'benchmark':<28}{'baseline':>10}{'now':>10}{'change':>9}")
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        ratio = result["best_ms"] / max(before["best_ms"], 1e-6)
+        flag = ""
+        if comparable and ratio > 1 + tolerance and result["best_ms"] - before["best_ms"] > min_ms:
+            regressed.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<28}{before['best_ms']:>10.2f}{result['best_ms']:>10.2f}{ratio - 1:>+9.0%}{flag}")
+    if regressed:
+        print(f"\nFAIL: slower than {path} by more than {tolerance:.0%}: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
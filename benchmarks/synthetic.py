@@ -0,0 +1,96 @@
+"""Seeded synthetic rosters for the benchmarks.
+
+make_roster() builds stations, watch times, sailors and leave in the same
+shapes the application loads from watchbill.db; populate_database() writes
+one into a database created by watchbill_db. The same arguments always give
+the same roster, so timings are comparable across commits.
+"""
+import random
+from datetime import date, timedelta
+
+RANKS = ["SN", "BM3", "BM2", "BM1", "BMC", "ENS", "LTJG", "LT"]
+LEAVE_TYPES = ["Leave", "TAD", "Medical", "Liberty", "School"]
+
+
+def watch_times(slots):
+    """Splits the day into slots back-to-back watches, e.g. 24 -> ("0000", "0100") ... ("2300", "0000")."""
+    length = 1440 // slots
+    times = []
+    for index in range(slots):
+        start, end = index * length, ((index + 1) * length) % 1440
+        times.append((f"{start // 60:02d}{start % 60:02d}", f"{end // 60:02d}{end % 60:02d}"))
+    return times
+
+
+def make_roster(sailors=1000, qualifications=40, stations=200, slots=24, leave_rows=20000, leave_days=365,
+                quals_per_sailor=4, start_date=date(2026, 1, 1), seed=0):
+    """Returns {"qualifications", "watchstations", "watchtimes", "sailors", "leaves"}.
+
+    Stations are OOD and Internal Rover plus numbered posts of the other
+    qualifications (Sentry1, Sentry2, ...). sailors rows are (id, rank,
+    last_name, qualifications), ids counting from 1, and leaves rows
+    (sailor_id, start_date, end_date, type, notes), with leave spread over
+    leave_days from start_date.
+    """
+    rng = random.Random(seed)
+    quals = ["OOD", "Internal Rover"] + [f"Post{letter}" for letter in _letters(qualifications - 2)]
+
+    watchstations = ["OOD", "Internal Rover"]
+    posts = quals[2:]
+    for index in range(stations - 2):
+        watchstations.append(f"{posts[index % len(posts)]}{index // len(posts) + 1}")
+
+    sailor_rows = []
+    for index in range(sailors):
+        held = rng.sample(quals, min(quals_per_sailor, len(quals)))
+        sailor_rows.append((index + 1, rng.choice(RANKS), f"Sailor{index:05d}", ",".join(held)))
+
+    leaves = []
+    for _ in range(leave_rows):
+        sailor_id = sailor_rows[rng.randrange(sailors)][0]
+        start = start_date + timedelta(days=rng.randrange(leave_days))
+        end = start + timedelta(days=rng.randint(0, 13))
+        leaves.append((sailor_id, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'), rng.choice(LEAVE_TYPES), ""))
+
+    return {"qualifications": quals, "watchstations": watchstations, "watchtimes": watch_times(slots),
+            "sailors": sailor_rows, "leaves": leaves}
+
+
+def _letters(count):
+    """A, B, ..., Z, AA, AB, ... for readable qualification names."""
+    names = []
+    index = 0
+    while len(names) < count:
+        name, value = "", index
+        while True:
+            name = chr(ord("A") + value % 26) + name
+            value = value // 26 - 1
+            if value < 0:
+                break
+        names.append(name)
+        index += 1
+    return names
+
+
+def populate_database(conn, roster):
+    """Writes a roster into an empty watchbill database in one transaction."""
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO qualifications (name, display_order) VALUES (?, ?)",
+                       [(name, index) for index, name in enumerate(roster["qualifications"])])
+    cursor.executemany("INSERT INTO watchstations (name, display_order) VALUES (?, ?)",
+                       [(name, index) for index, name in enumerate(roster["watchstations"])])
+    from watchbill_db import watch_time_minutes
+    cursor.executemany("INSERT INTO watch_times (start_time, end_time, start_minute, end_minute, spans_midnight) "
+                       "VALUES (?, ?, ?, ?, ?)",
+                       [(start, end, *watch_time_minutes(start, end)) for start, end in roster["watchtimes"]])
+    cursor.executemany("INSERT INTO sailors (id, rank, last_name, qualifications) VALUES (?, ?, ?, '')",
+                       [(sailor_id, rank, last_name) for sailor_id, rank, last_name, _ in roster["sailors"]])
+
+    cursor.execute("SELECT name, id FROM qualifications")
+    qual_ids = dict(cursor.fetchall())
+    cursor.executemany("INSERT INTO sailor_qualifications (sailor_id, qualification_id) VALUES (?, ?)",
+                       [(sailor_id, qual_ids[qual])
+                        for sailor_id, _, _, quals in roster["sailors"] for qual in quals.split(",") if qual])
+    cursor.executemany("INSERT INTO leaves (sailor_id, start_date, end_date, type, notes) VALUES (?, ?, ?, ?, ?)",
+                       roster["leaves"])
+    conn.commit()
@@ -0,0 +1,123 @@
+"""Tests for watchbill_db against a temporary database.
+
+Run with: python -m pytest tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import watchbill_db  # noqa: E402
+import watchbill_engine  # noqa: E402
+import watchbill_import  # noqa: E402
+
+DAY = date(2026, 11, 2)
+MORNING, AFTERNOON = "0800 - 1200", "1200 - 1600"
+
+
+class DatabaseTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        watchbill_db.connect(os.path.join(self.tmp, "watchbill.db"))
+
+    def tearDown(self):
+        watchbill_db.db.close()
+        shutil.rmtree(self.tmp)
+
+    def add_sailors(self, *rows):
+        """Adds (last_name, qualifications) sailors; returns {last_name: id}."""
+        for last_name, quals in rows:
+            watchbill_db.add_sailor("SN", last_name)
+            sailor_id = watchbill_db.db.query_one("SELECT MAX(id) FROM sailors")[0]
+            watchbill_db.update_sailor_qualifications(sailor_id, quals)
+        return {last_name: sailor_id for sailor_id, _, last_name, _ in watchbill_db.get_sailors()}
+
+
+class ResolveSavedWatchbillsTest(DatabaseTest):
+    def setUp(self):
+        super().setUp()
+        for name in ("Gate", "OOD"):
+            watchbill_db.add_qualification(name)
+            watchbill_db.add_watchstation(name)
+        watchbill_db.add_watch_time("0800", "1200")
+        watchbill_db.add_watch_time("1200", "1600")
+        self.ids = self.add_sailors(("Adams", ["Gate"]), ("Baker", ["Gate"]), ("Clark", ["OOD"]),
+                                    ("Davis", ["OOD"]), ("Evans", ["OOD"]))
+        ids = self.ids
+        watchbill_db.save_watchbill(DAY, {"Gate": {MORNING: ids["Adams"], AFTERNOON: ids["Adams"]},
+                                          "OOD": {MORNING: ids["Clark"], AFTERNOON: ids["Davis"]}})
+
+    def test_sailor_on_leave_is_replaced(self):
+        watchbill_db.add_leave(self.ids["Adams"], DAY, DAY, "Leave", "")
+        self.assertEqual(watchbill_db.resolve_saved_watchbills(DAY, DAY), 2)  # Both watches of the all-day station
+        bill = watchbill_db.load_watchbill(DAY)
+        self.assertEqual(bill["Gate"], {MORNING: self.ids["Baker"], AFTERNOON: self.ids["Baker"]})
+        self.assertEqual(bill["OOD"], {MORNING: self.ids["Clark"], AFTERNOON: self.ids["Davis"]})
+
+    def test_sailor_no_longer_qualified_is_replaced(self):
+        watchbill_db.update_sailor_qualifications(self.ids["Clark"], [])
+        self.assertEqual(watchbill_db.resolve_saved_watchbills(DAY, DAY), 1)
+        bill = watchbill_db.load_watchbill(DAY)
+        self.assertEqual(bill["OOD"], {MORNING: self.ids["Evans"], AFTERNOON: self.ids["Davis"]})
+        self.assertEqual(bill["Gate"][MORNING], self.ids["Adams"])
+
+    def test_removed_qualification_clears_its_holders(self):
+        watchbill_db.remove_qualification("Gate")
+        watchbill_db.resolve_saved_watchbills(DAY, DAY)
+        self.assertEqual(watchbill_db.load_watchbill(DAY)["Gate"], {MORNING: None, AFTERNOON: None})
+
+
+class WatchHistoryTest(DatabaseTest):
+    def test_tally_from_history_matches_the_saved_bills(self):
+        watchbill_db.add_watchstation("Gate")
+        watchbill_db.add_watch_time("0800", "1200")
+        watchbill_db.add_watch_time("2200", "0200")  # Crosses midnight: 240 minutes, not -1200
+        ids = self.add_sailors(("Adams", []), ("Baker", []))
+        bills = {DAY: {"Gate": {MORNING: ids["Adams"], "2200 - 0200": ids["Baker"]}},
+                 DAY + timedelta(days=1): {"Gate": {MORNING: ids["Baker"], "2200 - 0200": ids["Baker"]}}}
+        for day, bill in bills.items():
+            watchbill_db.save_watchbill(day, bill)
+        history = watchbill_db.get_watch_history(DAY + timedelta(days=2))
+        tally = watchbill_engine.WorkloadTally.from_history(history)
+        expected = watchbill_engine.WorkloadTally()
+        for day, bill in bills.items():
+            expected.add_watchbill(day, bill, watchbill_db.get_roster_inputs()[1])
+        for sailor_id in ids.values():
+            self.assertEqual(tally.load(sailor_id), expected.load(sailor_id))
+        self.assertEqual(tally.load(ids["Baker"]), (720, 3))
+
+
+class ImportRosterTest(DatabaseTest):
+    def write(self, name, text):
+        path = os.path.join(self.tmp, name)
+        with open(path, "w", newline="") as f:
+            f.write(text)
+        return path
+
+    def test_importing_the_same_sailors_again_adds_nobody(self):
+        path = self.write("sailors.csv", "rank,last_name,qualifications\nSN,Adams,Gate\nBM3,Adams,OOD\nSN,Baker,\n")
+        self.assertEqual(watchbill_import.import_roster([path])["sailors"], 3)
+        counts = watchbill_import.import_roster([path])
+        self.assertEqual((counts["sailors"], counts["qualifications"], counts["existing"]), (0, 0, 3))
+        self.assertEqual(len(watchbill_db.get_sailors()), 3)
+
+    def test_reimport_adds_new_qualifications_to_the_existing_sailor(self):
+        watchbill_import.import_roster([self.write("sailors.csv", "rank,last_name,qualifications\nSN,Adams,Gate\n")])
+        watchbill_import.import_roster([self.write("more.csv", "rank,last_name,qualifications\nSN,Adams,Gate;OOD\n")])
+        self.assertEqual([(rank, last_name, sorted(quals.split(",")))
+                          for _, rank, last_name, quals in watchbill_db.get_sailors()], [("SN", "Adams", ["Gate", "OOD"])])
+
+    def test_sailor_listed_twice_is_an_error(self):
+        path = self.write("sailors.csv", "rank,last_name\nSN,Adams\nSN,Adams\n")
+        with self.assertRaises(watchbill_import.RosterImportError) as caught:
+            watchbill_import.import_roster([path])
+        self.assertEqual(caught.exception.errors, ["sailors.csv line 3: SN Adams is already listed at sailors.csv line 2"])
+        self.assertEqual(watchbill_db.get_sailors(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+"""Regression tests for watchbill_engine: leave lookups, watch times and the matching solver.
+
+Run with: python -m pytest tests
+"""
+import os
+import random
+import sys
+import time
+import unittest
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import watchbill_engine as engine  # noqa: E402
+
+THREE_WATCHES = [("0000", "0800"), ("0800", "1600"), ("1600", "0000")]
+WATCH_PATTERNS = [
+    THREE_WATCHES,
+    [("0800", "1200"), ("1000", "1400"), ("1200", "1600"), ("2000", "0000")],
+    [("0000", "0400"), ("0400", "0800"), ("0800", "1200"), ("1200", "1600")],
+]
+QUALS = ["OOD", "Internal Rover", "Post", "Gate"]
+
+
+def match_day(stations, watchtimes, sailors, seed=0):
+    return engine._match_day(stations, watchtimes, engine.EligibilityIndex(stations, sailors), set(),
+                             random.Random(seed), engine.WorkloadTally())
+
+
+def cells(watchbill_data):
+    return sum(sailor is not None for row in watchbill_data.values() for sailor in row.values())
+
+
+def best_cells(stations, watchtimes, sailors):
+    """Most cells any legal bill can man, by exhaustive search."""
+    keys = [engine.watch_time_key(start, end) for start, end in watchtimes]
+    units = [(station, slot) for station in stations
+             for slot in (range(len(keys)) if station in engine.ROTATING_STATIONS else [None])]
+    eligibility = engine.EligibilityIndex(stations, sailors)
+    bill = engine.Occupancy(dict.fromkeys(units), len(keys), engine.slot_overlaps(watchtimes))
+    weight = [len(keys) if slot is None else 1 for _, slot in units]
+    best = [0]
+
+    def search(index, manned):
+        if manned + sum(weight[index:]) <= best[0]:
+            return
+        if index == len(units):
+            best[0] = manned
+            return
+        unit = units[index]
+        for sailor in eligibility.eligible(unit[0]):
+            if not bill.blockers(sailor, unit):
+                bill.move(unit, sailor)
+                search(index + 1, manned + weight[index])
+                bill.move(unit, None)
+        search(index + 1, manned)
+
+    search(0, 0)
+    return best[0]
+
+
+def double_booked(watchbill_data, watchtimes):
+    """Cells whose sailor clashes with another of their watches that day."""
+    keys = [engine.watch_time_key(start, end) for start, end in watchtimes]
+    bill = engine.Occupancy(engine.split_units(watchbill_data, keys, by_cell=True), len(keys),
+                            engine.slot_overlaps(watchtimes))
+    # by_cell splits an all-day station into one unit per watch; those only clash with each other
+    return [(unit, sailor) for unit, sailor in bill.holder.items() if sailor is not None
+            and any(other[0] != unit[0] or unit[0] == "OOD" for other in bill.blockers(sailor, unit))]
+
+
+class LeaveIndexTest(unittest.TestCase):
+    def test_matches_a_scan_of_every_leave_row(self):
+        rng = random.Random(3)
+        first = date(2026, 1, 1)
+        for _ in range(300):
+            leaves = []
+            for _ in range(rng.randint(0, 40)):
+                start = first + timedelta(days=rng.randrange(60))
+                end = start + timedelta(days=rng.randint(0, 10))
+                leaves.append((rng.randrange(15), start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')))
+            index = engine.LeaveIndex(leaves)
+            for _ in range(10):
+                since = first + timedelta(days=rng.randrange(-5, 75))
+                until = since + timedelta(days=rng.randint(0, 7))
+                expected = {sailor for sailor, start, end in leaves
+                            if start <= until.strftime('%Y-%m-%d') and end >= since.strftime('%Y-%m-%d')}
+                on_day = {sailor for sailor, start, end in leaves
+                          if start <= since.strftime('%Y-%m-%d') <= end}
+                self.assertEqual(index.unavailable_between(since, until), expected)
+                self.assertEqual(index.unavailable_on(since), on_day)
+                for sailor in range(15):
+                    self.assertEqual(index.is_unavailable(sailor, since, until), sailor in expected)
+
+
+class WatchTimeTest(unittest.TestCase):
+    def test_hour_24_is_only_midnight(self):
+        self.assertEqual(engine.parse_clock("2400"), engine.MINUTES_PER_DAY)
+        self.assertIsNone(engine.parse_clock("2430"))
+
+    def test_stored_minutes_give_the_parsed_interval(self):
+        for start, end in [("0800", "1200"), ("2000", "0000"), ("2200", "0200"), ("0000", "0000"), ("0800", "0800")]:
+            interval = engine.watch_interval(start, end)
+            stored = (interval[0], interval[1] % engine.MINUTES_PER_DAY, int(interval[1] > engine.MINUTES_PER_DAY))
+            self.assertEqual(engine.watch_intervals([(start, end, *stored)]), [interval], (start, end))
+
+
+class MatchDayTest(unittest.TestCase):
+    def test_all_day_station_is_not_lost_to_rover_watches(self):
+        stations = ["OOD", "Internal Rover", "Post"]
+        sailors = [(0, "SN", "S0", "OOD,Post"), (1, "SN", "S1", "OOD,Internal Rover"), (2, "SN", "S2", "OOD,Post")]
+        for seed in range(5):
+            bill = match_day(stations, THREE_WATCHES, sailors, seed)
+            self.assertEqual(cells(bill), 7)
+            self.assertEqual(double_booked(bill, THREE_WATCHES), [])
+
+    def test_short_handed_day_is_fast(self):
+        rng = random.Random(7)
+        quals = ["OOD", "Internal Rover"] + [f"Post{letter}" for letter in "ABCDEFGH"]
+        stations = ["OOD", "Internal Rover"] + [f"{quals[2 + index % 8]}{index // 8 + 1}" for index in range(38)]
+        watchtimes = [(f"{hour * 2:02d}00", f"{(hour * 2 + 2) % 24:02d}00") for hour in range(12)]
+        sailors = [(i, "SN", f"S{i}", ",".join(rng.sample(quals, 4))) for i in range(100)]
+        eligibility = engine.EligibilityIndex(stations, sailors)
+        for on_leave in (55, 65, 70):  # Fewer sailors than units, so many searches fail
+            away = set(range(on_leave))
+            started = time.perf_counter()
+            bill = engine._match_day(stations, watchtimes, eligibility, away, random.Random(0), engine.WorkloadTally())
+            self.assertLess(time.perf_counter() - started, 1.0, on_leave)
+            self.assertEqual(double_booked(bill, watchtimes), [])
+            self.assertFalse(away & {sailor for row in bill.values() for sailor in row.values()})
+            greedy = engine.SOLVERS["greedy"](stations, watchtimes, eligibility, away, random.Random(0),
+                                              engine.WorkloadTally())
+            self.assertGreaterEqual(cells(bill), cells(greedy), on_leave)
+
+    def test_fills_every_fillable_watch(self):
+        rng = random.Random(42)
+        for _ in range(150):
+            stations = rng.sample(QUALS, rng.randint(2, 4))
+            watchtimes = rng.choice(WATCH_PATTERNS)
+            sailors = [(i, "SN", f"S{i}", ",".join(rng.sample(QUALS, rng.randint(1, 3))))
+                       for i in range(rng.randint(1, 4))]
+            best = best_cells(stations, watchtimes, sailors)
+            for seed in range(2):
+                bill = match_day(stations, watchtimes, sailors, seed)
+                self.assertEqual(double_booked(bill, watchtimes), [], (stations, watchtimes, sailors))
+                self.assertEqual(cells(bill), best, (stations, watchtimes, sailors, seed))
+
+
+if __name__ == "__main__":
+    unittest.main()
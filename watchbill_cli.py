@@ -0,0 +1,213 @@
+"""Command-line batch mode for unattended watchbill generation.
+
+Runs without a display against the same watchbill.db as the Tk application,
+e.g. from cron to pre-build next month's bills overnight:
+
+    python watchbill_cli.py generate --from 2026-11-01 --to 2026-11-30 --out bills/
+    python watchbill_cli.py export --from 2026-11-01 --to 2026-11-30 --out november.pdf
+    python watchbill_cli.py import roster.xlsx
+
+Bills are generated, saved and written one day at a time, so a long range
+never sits in memory all at once.
+"""
+import argparse
+import os
+import random
+import sys
+
+import watchbill_db
+import watchbill_engine
+import watchbill_export
+import watchbill_import
+import watchbill_profile
+
+
+def generate(args):
+    """Generates, saves and (optionally) writes a watchbill for every day in the range."""
+    start_date, end_date = args.start_date, args.end_date
+    if end_date < start_date:
+        print("error: --to must not be before --from", file=sys.stderr)
+        return 1
+
+    if args.profile is not None:
+        profiler = watchbill_profile.Profiler(args.profile or None)
+    else:
+        profiler = watchbill_profile.profiler_from_env()
+    if profiler is None:
+        return _generate(args, None)
+    with profiler:
+        status = _generate(args, profiler)
+    profiler.report(f"generate {start_date} to {end_date}")
+    return status
+
+
+def _generate(args, profiler):
+    timed = watchbill_profile.phase_timer(profiler)
+    start_date, end_date = args.start_date, args.end_date
+    with timed("load"):
+        watchstations, watchtimes, sailors, leaves = watchbill_db.get_watchbill_inputs(start_date, end_date)
+    if not watchstations or not watchtimes:
+        print("error: add watch stations and times before generating", file=sys.stderr)
+        return 1
+
+    if not args.no_save and not args.replace:
+        saved_dates = watchbill_db.get_saved_watchbill_dates(start_date, end_date)
+        if saved_dates:
+            print(f"error: {len(saved_dates)} day(s) in this range already have a saved watchbill "
+                  f"(first: {saved_dates[0]}); pass --replace to overwrite them", file=sys.stderr)
+            return 1
+
+    if args.out:
+        try:
+            watchbill_export.check_format(args.format)
+        except ImportError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 1
+        os.makedirs(args.out, exist_ok=True)
+
+    with timed("eligibility"):
+        eligibility = watchbill_db.get_eligibility_index(watchstations, sailors)
+    with timed("load"):
+        tally = watchbill_engine.WorkloadTally.from_history(watchbill_db.get_watch_history(start_date))
+    options = dict(method=args.method, optimize_ms=args.optimize_ms, eligibility=eligibility, tally=tally)
+    if args.seed is not None and args.optimize_ms:
+        # Annealing against the clock depends on machine load, so a seeded run gets a fixed number of moves
+        from watchbill_optimizer import MOVES_PER_MS
+        options["optimize_moves"] = args.optimize_ms * MOVES_PER_MS
+    if args.candidates > 1:
+        from watchbill_optimizer import format_breakdown, generate_best_watchbills
+        bills = generate_best_watchbills(start_date, end_date, watchstations, watchtimes, sailors, leaves,
+                                         candidates=args.candidates, workers=args.workers, seed=args.seed, **options)
+        if profiler is not None:  # Candidates are built in worker processes, so only their total time is known
+            bills = profiler.iterate("assignment", bills)
+    else:
+        bills = ((day, watchbill_data, None) for day, watchbill_data in watchbill_engine.create_watchbills(
+            start_date, end_date, watchstations, watchtimes, sailors, leaves, rng=random.Random(args.seed),
+            profiler=profiler, **options))
+
+    for day, watchbill_data, breakdown in bills:
+        if not args.no_save:
+            with timed("save"):
+                watchbill_db.save_watchbill(day, watchbill_data)
+        unfilled = sum(1 for row in watchbill_data.values() for sailor_id in row.values() if sailor_id is None)
+        line = f"{day.strftime('%Y-%m-%d')}  {unfilled} unfilled"
+        if breakdown is not None:
+            line += f"  {format_breakdown(breakdown)}"
+        if args.out:
+            path = os.path.join(args.out, f"watchbill-{day.strftime('%Y-%m-%d')}.{args.format}")
+            with timed("render"):
+                watchbill_export.export_watchbills(path, [(day, watchbill_data)], watchtimes, sailors, args.format)
+            line += f"  {path}"
+        print(line, flush=True)
+    return 0
+
+
+def export(args):
+    """Exports the saved watchbills in the range to a single file (one PNG per day)."""
+    _, watchtimes, sailors = watchbill_db.get_roster_inputs()
+
+    def report(bills):
+        for day, watchbill_data in bills:
+            print(day.strftime('%Y-%m-%d'), flush=True)
+            yield day, watchbill_data
+
+    try:
+        if os.path.dirname(args.out):
+            os.makedirs(os.path.dirname(args.out), exist_ok=True)
+        count = watchbill_export.export_watchbills(
+            args.out, report(watchbill_db.iter_saved_watchbills(args.start_date, args.end_date)),
+            watchtimes, sailors, args.format)
+    except (ValueError, ImportError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    if not count:
+        print("warning: no saved watchbills in this range", file=sys.stderr)
+    return 0
+
+
+def import_files(args):
+    """Validates and loads sailors, qualification assignments and leave from CSV/XLSX files."""
+    try:
+        counts = watchbill_import.import_roster(args.files, args.kind)
+    except watchbill_import.RosterImportError as e:
+        for error in e.errors:
+            print(f"error: {error}", file=sys.stderr)
+        print(f"{len(e.errors)} problem(s) found, nothing was imported", file=sys.stderr)
+        return 1
+    except (ValueError, ImportError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(f"imported {counts['sailors']} sailor(s), {counts['qualifications']} qualification assignment(s) "
+          f"and {counts['leave']} leave row(s)")
+    if counts["existing"]:
+        print(f"{counts['existing']} sailor(s) were already on the roster and were not added again")
+    if counts["leave_from"] is not None and not args.no_resolve:
+        changed = watchbill_db.resolve_saved_watchbills(counts["leave_from"])
+        if changed:
+            print(f"reassigned {changed} watch(es) on saved watchbills affected by the new leave")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="watchbill", description="Navy in-port watchbill batch tools.")
+    parser.add_argument("--db", help="database file (default: $WATCHBILL_DB, else watchbill.db beside the program)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="generate and save watchbills for a date range")
+    gen.add_argument("--from", dest="start_date", required=True, type=watchbill_engine.parse_date,
+                     help="first day, YYYY-MM-DD")
+    gen.add_argument("--to", dest="end_date", type=watchbill_engine.parse_date,
+                     help="last day, YYYY-MM-DD (default: same as --from)")
+    gen.add_argument("--out", help="directory to write one file per day into")
+    gen.add_argument("--format", choices=sorted(watchbill_export.EXPORTERS), default="csv",
+                     help="file format for --out (default: csv)")
+    gen.add_argument("--method", choices=sorted(watchbill_engine.SOLVERS), default="matching")
+    gen.add_argument("--optimize-ms", type=int, default=200, help="optimizer time per day, 0 = off (default: 200)")
+    gen.add_argument("--seed", type=int,
+                     help="random seed, for repeatable runs; the optimizer then makes a fixed number of moves "
+                          "in place of --optimize-ms of time")
+    gen.add_argument("--candidates", type=int, default=1,
+                     help="generate this many bills per day in parallel and keep the best (default: 1)")
+    gen.add_argument("--workers", type=int, help="worker processes for --candidates (default: one per CPU core)")
+    gen.add_argument("--replace", action="store_true", help="overwrite watchbills already saved in the range")
+    gen.add_argument("--no-save", action="store_true", help="do not save the generated bills to the database")
+    gen.add_argument("--profile", nargs="?", const="", metavar="PSTATS",
+                     help="print per-phase timings to stderr, and write a cProfile dump to PSTATS if given "
+                          "(default: $WATCHBILL_PROFILE)")
+    gen.set_defaults(func=generate)
+
+    exp = commands.add_parser("export", help="export saved watchbills to CSV, XLSX, PDF or PNG")
+    exp.add_argument("--from", dest="start_date", required=True, type=watchbill_engine.parse_date,
+                     help="first day, YYYY-MM-DD")
+    exp.add_argument("--to", dest="end_date", type=watchbill_engine.parse_date,
+                     help="last day, YYYY-MM-DD (default: same as --from)")
+    exp.add_argument("--out", required=True, help="file to write; PNG writes one <name>-YYYY-MM-DD.png per day")
+    exp.add_argument("--format", choices=sorted(watchbill_export.EXPORTERS),
+                     help="file format (default: taken from the --out extension)")
+    exp.set_defaults(func=export)
+
+    imp = commands.add_parser("import", help="bulk import sailors, qualifications and leave from CSV or XLSX")
+    imp.add_argument("files", nargs="+", help="CSV files (one kind each) or XLSX workbooks (one sheet per kind)")
+    imp.add_argument("--kind", choices=watchbill_import.KINDS,
+                     help="read every file as this kind instead of recognising it from the header")
+    imp.add_argument("--no-resolve", action="store_true",
+                     help="do not repair saved watchbills that the imported leave affects")
+    imp.set_defaults(func=import_files)
+
+    args = parser.parse_args(argv)
+    if "end_date" in vars(args) and args.end_date is None:
+        args.end_date = args.start_date
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    watchbill_db.connect(args.db)
+    try:
+        return args.func(args)
+    finally:
+        watchbill_db.db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,627 @@
+"""SQLite storage for the watchbill application.
+
+Holds the data-access functions used by the Tk application and the
+command-line tools. connect() opens the database they use and creates or
+migrates its schema; importing the module opens nothing. Nothing here
+imports Tk, so it works without a display.
+
+All SQL goes through one Database object. It owns the connection, runs in
+WAL mode with a busy timeout so the GUI and a batch job can share the file,
+and groups multi-statement changes into a single transaction (one commit,
+one fsync). Statements use fixed SQL text with bound parameters, so sqlite3
+prepares each one once and reuses it from its statement cache.
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import groupby
+
+import watchbill_engine
+
+eligibility_index = None  # Cached watchbill_engine.EligibilityIndex, see get_eligibility_index()
+
+
+class Database:
+    """The application's SQLite connection plus transaction handling.
+
+    Reads go through query()/query_one(). Writes go inside transaction(),
+    which commits once when the outermost block ends and rolls everything
+    back if it raises; nested blocks join the enclosing transaction.
+    """
+
+    def __init__(self, path, busy_timeout_ms=5000):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=busy_timeout_ms / 1000, cached_statements=256)
+        self.conn.execute("PRAGMA journal_mode=WAL")  # Readers do not block the writer, and commits append to the log
+        self.conn.execute("PRAGMA synchronous=NORMAL")  # Durable enough with WAL, and no fsync per commit
+        self.conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        self._depth = 0
+
+    @contextmanager
+    def transaction(self):
+        """Runs the with-block as one transaction."""
+        if self._depth:
+            yield self
+            return
+        self._depth += 1
+        try:
+            with self.conn:  # Commits on success, rolls back on error
+                if not self.conn.in_transaction:
+                    self.conn.execute("BEGIN")  # Explicitly, so DDL is covered too
+                yield self
+        finally:
+            self._depth -= 1
+
+    def execute(self, sql, params=()):
+        return self.conn.execute(sql, params)
+
+    def executemany(self, sql, rows):
+        return self.conn.executemany(sql, rows)
+
+    def query(self, sql, params=()):
+        """Returns every row of a SELECT."""
+        return self.conn.execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=()):
+        """Returns the first row of a SELECT, or None."""
+        return self.conn.execute(sql, params).fetchone()
+
+    def column(self, sql, params=()):
+        """Returns the first column of every row of a SELECT."""
+        return [row[0] for row in self.conn.execute(sql, params)]
+
+    def close(self):
+        self.conn.close()
+
+
+def watch_time_minutes(start_time, end_time):
+    """Returns the (start_minute, end_minute, spans_midnight) columns stored for a watch time.
+
+    Minutes count from midnight; spans_midnight is 1 when the watch ends on the
+    next day. Times that cannot be read give (None, None, 0).
+    """
+    interval = watchbill_engine.watch_interval(start_time, end_time)
+    if interval is None:
+        return None, None, 0
+    start_minute, end_minute = interval
+    return (start_minute, end_minute % watchbill_engine.MINUTES_PER_DAY,
+            int(end_minute > watchbill_engine.MINUTES_PER_DAY))
+
+
+# --- Schema Migrations ---
+# Migration N upgrades a database from schema version N - 1 to N, and PRAGMA user_version records
+# the last one applied. A schema change is a new function at the end of MIGRATIONS; never edit one
+# that has shipped, since databases that already ran it will not run it again.
+
+def _columns(database, table):
+    return {row[1] for row in database.query(f"PRAGMA table_info({table})")}
+
+def _create_base_schema(database):
+    """1: sailors, qualifications, stations, watch times, leave, the qualification join table and saved bills.
+
+    Databases from before schema versioning may already hold some of these
+    tables, in older shapes, so this step fills in whatever is missing.
+    """
+    database.execute('''
+        CREATE TABLE IF NOT EXISTS sailors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            rank TEXT,
+            last_name TEXT,
+            qualifications TEXT
+        )
+    ''')
+
+    database.execute('''
+        CREATE TABLE IF NOT EXISTS qualifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE,
+            display_order INTEGER
+        )
+    ''')
+    if "display_order" not in _columns(database, "qualifications"):
+        database.execute("ALTER TABLE qualifications ADD COLUMN display_order INTEGER")
+    database.execute("UPDATE qualifications SET display_order = id WHERE display_order IS NULL")  # Initial order based on id
+
+    database.execute('''
+        CREATE TABLE IF NOT EXISTS watchstations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE,
+            display_order INTEGER
+        )
+    ''')
+    database.execute("UPDATE watchstations SET display_order = id WHERE display_order IS NULL")
+
+    database.execute('''
+        CREATE TABLE IF NOT EXISTS watch_times (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            start_time TEXT,
+            end_time TEXT,
+            UNIQUE(start_time, end_time)  -- Prevent duplicate entries
+        )
+    ''')
+
+    database.execute('''
+        CREATE TABLE IF NOT EXISTS leaves (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sailor_id INTEGER,
+            start_date DATE,
+            end_date DATE,
+            type TEXT,
+            notes TEXT,
+            FOREIGN KEY (sailor_id) REFERENCES sailors (id)
+        )
+    ''')
+
+    # The sailor <-> qualification join table
+    backfill_sailor_qualifications = database.query_one(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='sailor_qualifications'") is None
+    database.execute('''
+        CREATE TABLE IF NOT EXISTS sailor_qualifications (
+            sailor_id INTEGER NOT NULL,
+            qualification_id INTEGER NOT NULL,
+            PRIMARY KEY (sailor_id, qualification_id),
+            FOREIGN KEY (sailor_id) REFERENCES sailors (id),
+            FOREIGN KEY (qualification_id) REFERENCES qualifications (id)
+        )
+    ''')
+    database.execute("CREATE INDEX IF NOT EXISTS idx_sailor_qualifications_qualification "
+                     "ON sailor_qualifications (qualification_id)")
+    if backfill_sailor_qualifications:
+        # Move the old comma-joined sailors.qualifications column into the join table.
+        # Names no longer in the qualifications table (orphaned by a rename) are re-added.
+        for sailor_id, qualifications in database.query(
+                "SELECT id, qualifications FROM sailors WHERE qualifications IS NOT NULL AND qualifications != ''"):
+            for qual in qualifications.split(","):
+                database.execute("INSERT OR IGNORE INTO qualifications (name, display_order) "
+                                 "VALUES (?, (SELECT COALESCE(MAX(display_order), -1) + 1 FROM qualifications))", (qual,))
+                database.execute("INSERT OR IGNORE INTO sailor_qualifications (sailor_id, qualification_id) "
+                                 "SELECT ?, id FROM qualifications WHERE name=?", (sailor_id, qual))
+
+    # Saved watchbill assignments (one row per station per watch per day)
+    database.execute('''
+        CREATE TABLE IF NOT EXISTS watchbill_assignments (
+            bill_date DATE NOT NULL,
+            station_id INTEGER NOT NULL,
+            watch_time_id INTEGER NOT NULL,
+            sailor_id INTEGER,  -- NULL for a watch left unassigned
+            PRIMARY KEY (bill_date, station_id, watch_time_id),
+            FOREIGN KEY (station_id) REFERENCES watchstations (id),
+            FOREIGN KEY (watch_time_id) REFERENCES watch_times (id),
+            FOREIGN KEY (sailor_id) REFERENCES sailors (id)
+        )
+    ''')
+    database.execute("CREATE INDEX IF NOT EXISTS idx_watchbill_assignments_sailor "
+                     "ON watchbill_assignments (sailor_id, bill_date)")
+
+def _add_watch_time_minutes(database):
+    """2: watch times also kept as minutes since midnight, parsed from the existing text."""
+    database.execute("ALTER TABLE watch_times ADD COLUMN start_minute INTEGER")  # NULL if start_time cannot be read
+    database.execute("ALTER TABLE watch_times ADD COLUMN end_minute INTEGER")
+    database.execute("ALTER TABLE watch_times ADD COLUMN spans_midnight INTEGER NOT NULL DEFAULT 0")
+    database.executemany("UPDATE watch_times SET start_minute=?, end_minute=?, spans_midnight=? WHERE id=?",
+                         [(*watch_time_minutes(start, end), _id)
+                          for _id, start, end in database.query("SELECT id, start_time, end_time FROM watch_times")])
+
+def _add_sailor_indexes(database):
+    """3: index for leave by sailor id."""
+    database.execute("CREATE INDEX IF NOT EXISTS idx_leaves_sailor ON leaves (sailor_id)")
+
+def _add_leave_date_index(database):
+    """4: index for leave overlapping a date window, led by end_date so leave that ended before it is never read."""
+    database.execute("CREATE INDEX IF NOT EXISTS idx_leaves_end_date ON leaves (end_date, start_date)")
+
+MIGRATIONS = (_create_base_schema, _add_watch_time_minutes, _add_sailor_indexes, _add_leave_date_index)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def migrate(database):
+    """Applies the migrations a database has not had yet, each in its own transaction.
+
+    An up-to-date database costs a single PRAGMA read. Returns the number of
+    migrations applied; raises RuntimeError for a database written by a newer
+    version of the application.
+    """
+    version = database.query_one("PRAGMA user_version")[0]
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(f"{database.path} has schema version {version}, but this version of the application "
+                           f"only understands up to {SCHEMA_VERSION}")
+    for number in range(version + 1, SCHEMA_VERSION + 1):
+        with database.transaction():
+            MIGRATIONS[number - 1](database)
+            database.execute(f"PRAGMA user_version = {number}")  # Committed together with the migration
+    return SCHEMA_VERSION - version
+
+
+# --- Database Setup ---
+# Your database file; by default the one beside this module, so cron finds it from any working directory
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "watchbill.db")
+
+db = None  # The open Database, see connect()
+
+def connect(path=None):
+    """Opens the database the functions below use, creating or migrating its schema; returns it.
+
+    path defaults to $WATCHBILL_DB, else DEFAULT_DB_PATH. Any database
+    opened earlier is closed first.
+    """
+    global db
+    if db is not None:
+        db.close()
+    db = Database(path or os.environ.get("WATCHBILL_DB") or DEFAULT_DB_PATH)
+    invalidate_eligibility_index()  # Cached for the previous database
+    migrate(db)
+    return db
+
+# --- Data Access Functions ---
+def invalidate_eligibility_index():
+    """Drops the cached eligibility index; call after sailors, qualifications or stations change."""
+    global eligibility_index
+    eligibility_index = None
+
+def get_eligibility_index(watchstations=None, sailors=None):
+    """Returns the cached station -> qualified sailors index, building it if needed."""
+    global eligibility_index
+    if eligibility_index is None:
+        if watchstations is None:
+            watchstations = get_watchstations()
+        eligibility_index = watchbill_engine.EligibilityIndex(watchstations, sailors if sailors is not None else get_sailors())
+    return eligibility_index
+
+def add_sailor(rank, last_name):
+    with db.transaction():
+        db.execute("INSERT INTO sailors (rank, last_name, qualifications) VALUES (?, ?, ?)", (rank, last_name, ""))
+    invalidate_eligibility_index()
+
+def remove_sailor(sailor_id):
+    with db.transaction():
+        db.execute("DELETE FROM sailor_qualifications WHERE sailor_id=?", (sailor_id,))
+        db.execute("DELETE FROM leaves WHERE sailor_id=?", (sailor_id,))
+        db.execute("UPDATE watchbill_assignments SET sailor_id=NULL WHERE sailor_id=?", (sailor_id,))
+        db.execute("DELETE FROM sailors WHERE id=?", (sailor_id,))
+    invalidate_eligibility_index()
+
+def edit_sailor(sailor_id, new_rank, new_last_name):
+    with db.transaction():
+        db.execute("UPDATE sailors SET rank=?, last_name=? WHERE id=?", (new_rank, new_last_name, sailor_id))
+    invalidate_eligibility_index()
+
+def get_sailors():
+    """Returns (id, rank, last_name, qualifications) rows, qualifications comma-joined from sailor_qualifications."""
+    return db.query("SELECT s.id, s.rank, s.last_name, COALESCE(GROUP_CONCAT(q.name), '') "
+                    "FROM sailors s "
+                    "LEFT JOIN sailor_qualifications sq ON sq.sailor_id = s.id "
+                    "LEFT JOIN qualifications q ON q.id = sq.qualification_id "
+                    "GROUP BY s.id ORDER BY s.id")
+
+def add_qualification(qualification):
+    try:
+        with db.transaction():
+            db.execute("INSERT INTO qualifications (name) VALUES (?)", (qualification,))
+        return True
+    except sqlite3.IntegrityError:
+        return False
+
+def remove_qualification(qualification):
+    with db.transaction():
+        db.execute("DELETE FROM sailor_qualifications WHERE qualification_id IN (SELECT id FROM qualifications WHERE name=?)", (qualification,))
+        db.execute("DELETE FROM qualifications WHERE name=?", (qualification,))
+    invalidate_eligibility_index()
+
+def rename_qualification(old_name, new_name):
+    try:
+        with db.transaction():
+            db.execute("UPDATE qualifications SET name=? WHERE name=?", (new_name, old_name))
+        invalidate_eligibility_index()
+        return True
+    except sqlite3.IntegrityError:
+        return False
+
+def get_qualifications():
+    return db.column("SELECT name FROM qualifications ORDER BY display_order") # Add ORDER BY
+
+def set_qualification_order(names):
+    """Renumbers display_order to follow names, in one transaction."""
+    with db.transaction():
+        db.executemany("UPDATE qualifications SET display_order = ? WHERE name = ?",
+                       [(index, name) for index, name in enumerate(names)])
+
+def get_sailor_qualifications(sailor_id):
+    return db.column("SELECT q.name FROM sailor_qualifications sq "
+                     "JOIN qualifications q ON q.id = sq.qualification_id "
+                     "WHERE sq.sailor_id=?", (sailor_id,))
+
+def update_sailor_qualifications(sailor_id, qualifications):
+    with db.transaction():
+        db.execute("DELETE FROM sailor_qualifications WHERE sailor_id=?", (sailor_id,))
+        db.executemany("INSERT OR IGNORE INTO sailor_qualifications (sailor_id, qualification_id) "
+                       "SELECT ?, id FROM qualifications WHERE name=?",
+                       [(sailor_id, qual) for qual in qualifications])
+    invalidate_eligibility_index()
+
+def get_watchstations():
+    """Returns station names in display order."""
+    return db.column("SELECT name FROM watchstations ORDER BY display_order")
+
+def add_watchstation(name):
+    """Adds a station at the end of the display order; raises sqlite3.IntegrityError for a duplicate name."""
+    with db.transaction():
+        db.execute("INSERT INTO watchstations (name, display_order) "
+                   "VALUES (?, (SELECT COALESCE(MAX(display_order), -1) + 1 FROM watchstations))", (name,))
+    invalidate_eligibility_index()
+
+def remove_watchstation(name):
+    with db.transaction():
+        db.execute("DELETE FROM watchbill_assignments WHERE station_id IN (SELECT id FROM watchstations WHERE name=?)", (name,))
+        db.execute("DELETE FROM watchstations WHERE name=?", (name,))
+    invalidate_eligibility_index()
+
+def rename_watchstation(old_name, new_name):
+    """Renames a station; raises sqlite3.IntegrityError if the new name is taken."""
+    with db.transaction():
+        db.execute("UPDATE watchstations SET name=? WHERE name=?", (new_name, old_name))
+    invalidate_eligibility_index()
+
+def set_watchstation_order(names):
+    """Renumbers display_order to follow names, in one transaction."""
+    with db.transaction():
+        db.executemany("UPDATE watchstations SET display_order = ? WHERE name = ?",
+                       [(index, name) for index, name in enumerate(names)])
+
+WATCH_TIME_ORDER = "start_minute IS NULL, start_minute, end_minute, id"  # Chronological; unreadable times last
+
+def get_watch_times():
+    """Returns (id, start_time, end_time) rows in chronological order."""
+    return db.query(f"SELECT id, start_time, end_time FROM watch_times ORDER BY {WATCH_TIME_ORDER}")
+
+def _check_watch_time(start_time, end_time):
+    minutes = watch_time_minutes(start_time, end_time)
+    if minutes[0] is None:
+        raise ValueError(f"Watch times must look like 0800 or 08:00 (got '{start_time}' - '{end_time}')")
+    return minutes
+
+def add_watch_time(start_time, end_time):
+    """Adds a watch time; raises ValueError for unreadable times or sqlite3.IntegrityError if it already exists."""
+    minutes = _check_watch_time(start_time, end_time)
+    with db.transaction():
+        db.execute("INSERT INTO watch_times (start_time, end_time, start_minute, end_minute, spans_midnight) "
+                   "VALUES (?, ?, ?, ?, ?)", (start_time, end_time, *minutes))
+
+def remove_watch_time(watch_time_id):
+    with db.transaction():
+        db.execute("DELETE FROM watchbill_assignments WHERE watch_time_id=?", (watch_time_id,))
+        db.execute("DELETE FROM watch_times WHERE id=?", (watch_time_id,))
+
+def edit_watch_time(watch_time_id, start_time, end_time):
+    """Changes a watch time; raises ValueError for unreadable times or sqlite3.IntegrityError if they already exist."""
+    minutes = _check_watch_time(start_time, end_time)
+    with db.transaction():
+        db.execute("UPDATE watch_times SET start_time=?, end_time=?, start_minute=?, end_minute=?, spans_midnight=? "
+                   "WHERE id=?", (start_time, end_time, *minutes, watch_time_id))
+
+def add_leave(sailor_id, start_date, end_date, leave_type, notes):
+    start_date_str = start_date.strftime('%Y-%m-%d')  # Format the date
+    end_date_str = end_date.strftime('%Y-%m-%d')  # Format the date
+    with db.transaction():
+        db.execute("INSERT INTO leaves (sailor_id, start_date, end_date, type, notes) VALUES (?, ?, ?, ?, ?)",
+                   (sailor_id, start_date_str, end_date_str, leave_type, notes))
+
+
+def remove_leave(leave_id):
+    with db.transaction():
+        db.execute("DELETE FROM leaves WHERE id=?", (leave_id,))
+
+LEAVE_ORDERS = {  # Sort orders offered by get_leaves()
+    "start": "l.start_date, l.end_date, l.id",
+    "end": "l.end_date, l.start_date, l.id",
+    "name": "s.last_name, s.rank, l.start_date, l.id",
+    "id": "l.id",
+}
+
+def _leave_window(start_date, end_date):
+    """Returns the WHERE clause and parameters for leave overlapping [start_date, end_date]; either end may be None."""
+    conditions, params = [], []
+    if start_date is not None:  # Leave that ended before the window is skipped, using idx_leaves_end_date
+        conditions.append("l.end_date >= ?")
+        params.append(start_date.strftime('%Y-%m-%d'))
+    if end_date is not None:  # So is leave that starts after it
+        conditions.append("l.start_date <= ?")
+        params.append(end_date.strftime('%Y-%m-%d'))
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+def get_leaves(start_date=None, end_date=None, order="start"):
+    """Returns (id, sailor_id, last_name, start_date, end_date, type, notes, rank) rows.
+
+    Only leave overlapping start_date..end_date (inclusive, either may be None
+    for no limit) is read; order is one of LEAVE_ORDERS.
+    """
+    where, params = _leave_window(start_date, end_date)
+    return db.query("SELECT l.id, s.id, s.last_name, l.start_date, l.end_date, l.type, l.notes, s.rank "
+                    "FROM leaves l "
+                    "JOIN sailors s ON l.sailor_id = s.id" + where + " ORDER BY " + LEAVE_ORDERS[order], params)
+
+def get_sailors_on_leave(day):
+    """Returns the ids of sailors with leave covering day."""
+    day_str = day.strftime('%Y-%m-%d')
+    return set(db.column("SELECT sailor_id FROM leaves WHERE start_date <= ? AND end_date >= ?", (day_str, day_str)))
+
+def get_leave(leave_id):
+    """Returns (start_date, end_date, type, notes, last_name) for one leave row, or None."""
+    return db.query_one("SELECT l.start_date, l.end_date, l.type, l.notes, s.last_name "
+                        "FROM leaves l "
+                        "JOIN sailors s ON l.sailor_id = s.id "
+                        "WHERE l.id=?", (leave_id,))
+
+def edit_leave(leave_id, new_start_date, new_end_date, new_leave_type, new_notes):
+    new_start_date_str = new_start_date.strftime('%Y-%m-%d') # Format the date
+    new_end_date_str = new_end_date.strftime('%Y-%m-%d')     # Format the date
+
+    with db.transaction():
+        db.execute("UPDATE leaves SET start_date=?, end_date=?, type=?, notes=? WHERE id=?",
+                   (new_start_date_str, new_end_date_str, new_leave_type, new_notes, leave_id))
+
+def bulk_import(sailors=(), qualifications=(), leaves=()):
+    """Loads validated import rows in one transaction (see watchbill_import).
+
+    sailors is (rank, last_name, qualifications, leaves) rows for new sailors,
+    each carrying the qualification names and (start_date, end_date, type,
+    notes) leave imported for them. qualifications (sailor_id, qualification)
+    and leaves (sailor_id, start_date, end_date, type, notes) are for sailors
+    already on the roster. Dates are 'YYYY-MM-DD'; qualification names not yet
+    defined are added at the end of the display order.
+    """
+    qualifications, leaves = list(qualifications), list(leaves)
+    with db.transaction():
+        for rank, last_name, quals, sailor_leaves in sailors:  # One at a time, for each new sailor's id
+            sailor_id = db.execute("INSERT INTO sailors (rank, last_name, qualifications) VALUES (?, ?, '')",
+                                   (rank, last_name)).lastrowid
+            qualifications += [(sailor_id, qual) for qual in quals]
+            leaves += [(sailor_id, *leave) for leave in sailor_leaves]
+        db.executemany("INSERT OR IGNORE INTO qualifications (name, display_order) "
+                       "VALUES (?, (SELECT COALESCE(MAX(display_order), -1) + 1 FROM qualifications))",
+                       [(qual,) for qual in dict.fromkeys(qual for _, qual in qualifications)])
+        qual_ids = dict(db.query("SELECT name, id FROM qualifications"))
+        db.executemany("INSERT OR IGNORE INTO sailor_qualifications (sailor_id, qualification_id) VALUES (?, ?)",
+                       [(sailor_id, qual_ids[qual]) for sailor_id, qual in qualifications])
+        db.executemany("INSERT INTO leaves (sailor_id, start_date, end_date, type, notes) VALUES (?, ?, ?, ?, ?)",
+                       leaves)
+    if sailors or qualifications:
+        invalidate_eligibility_index()
+
+def get_roster_inputs():
+    """Loads the stations, watch times and sailors a watchbill is built or displayed from.
+
+    Watch times are (start_time, end_time, start_minute, end_minute,
+    spans_midnight) rows, so the engine need not parse the times again.
+    """
+    watchtimes = db.query("SELECT start_time, end_time, start_minute, end_minute, spans_midnight "
+                          f"FROM watch_times ORDER BY {WATCH_TIME_ORDER}")
+    return get_watchstations(), watchtimes, get_sailors()
+
+def get_leave_rows(start_date=None, end_date=None):
+    """Returns (sailor_id, start_date, end_date) rows for leave overlapping start_date..end_date, as generation needs."""
+    where, params = _leave_window(start_date, end_date)
+    return db.query("SELECT l.sailor_id, l.start_date, l.end_date FROM leaves l" + where, params)
+
+def get_watchbill_inputs(start_date=None, end_date=None):
+    """Loads everything generation needs in one go: stations, watch times, sailors and leave.
+
+    Leave is limited to rows overlapping start_date..end_date when given, so
+    years of past leave are not read to generate next week. Callers that only
+    display or export bills want get_roster_inputs() instead.
+    """
+    return (*get_roster_inputs(), get_leave_rows(start_date, end_date))
+
+def save_watchbill(bill_date, watchbill_data):
+    """Saves a generated watchbill ({station: {time_key: sailor_id or None}}), replacing any saved for that date.
+
+    The delete and the bulk insert share one transaction, so a bill costs a single commit.
+    """
+    station_ids = dict(db.query("SELECT name, id FROM watchstations"))
+    time_ids = {watchbill_engine.watch_time_key(start, end): _id for _id, start, end in get_watch_times()}
+    sailor_ids = set(db.column("SELECT id FROM sailors"))
+
+    bill_date_str = bill_date.strftime('%Y-%m-%d')
+    rows = [(bill_date_str, station_ids[station], time_ids[key], sailor_id if sailor_id in sailor_ids else None)
+            for station, row in watchbill_data.items() if station in station_ids
+            for key, sailor_id in row.items() if key in time_ids]
+    with db.transaction():
+        db.execute("DELETE FROM watchbill_assignments WHERE bill_date=?", (bill_date_str,))
+        db.executemany("INSERT INTO watchbill_assignments (bill_date, station_id, watch_time_id, sailor_id) "
+                       "VALUES (?, ?, ?, ?)", rows)
+
+def save_assignments(bill_date, assignments):
+    """Saves (station, start_time, end_time, sailor_id or None) edits to a saved watchbill in one transaction."""
+    bill_date_str = bill_date.strftime('%Y-%m-%d')
+    with db.transaction():
+        db.executemany("INSERT OR REPLACE INTO watchbill_assignments (bill_date, station_id, watch_time_id, sailor_id) "
+                       "SELECT ?, ws.id, wt.id, ? "
+                       "FROM watchstations ws, watch_times wt "
+                       "WHERE ws.name=? AND wt.start_time=? AND wt.end_time=?",
+                       [(bill_date_str, sailor_id, station, start_time, end_time)
+                        for station, start_time, end_time, sailor_id in assignments])
+
+def save_assignment(bill_date, station, start_time, end_time, sailor_id):
+    """Saves a single manual edit to a saved watchbill."""
+    save_assignments(bill_date, [(station, start_time, end_time, sailor_id)])
+
+def load_watchbill(bill_date):
+    """Returns the saved watchbill for a date as {station: {time_key: sailor_id or None}}, or None if there is none."""
+    rows = db.query("SELECT ws.name, wt.start_time, wt.end_time, a.sailor_id "
+                    "FROM watchbill_assignments a "
+                    "JOIN watchstations ws ON ws.id = a.station_id "
+                    "JOIN watch_times wt ON wt.id = a.watch_time_id "
+                    "WHERE a.bill_date=?", (bill_date.strftime('%Y-%m-%d'),))
+    if not rows:
+        return None
+    watchbill_data = {}
+    for station, start, end, sailor_id in rows:
+        watchbill_data.setdefault(station, {})[watchbill_engine.watch_time_key(start, end)] = sailor_id
+    return watchbill_data
+
+def get_saved_watchbill_dates(start_date, end_date):
+    """Returns the dates between start_date and end_date (inclusive) that already have a saved watchbill."""
+    return db.column("SELECT DISTINCT bill_date FROM watchbill_assignments WHERE bill_date BETWEEN ? AND ? ORDER BY bill_date",
+                     (start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')))
+
+def iter_saved_watchbills(start_date, end_date):
+    """Yields (bill_date, watchbill_data) for each saved watchbill in the range, one day at a time.
+
+    Rows come from a single ordered query read lazily, so only one day's bill
+    is built at a time.
+    """
+    rows = db.execute("SELECT a.bill_date, ws.name, wt.start_time, wt.end_time, a.sailor_id "
+                      "FROM watchbill_assignments a "
+                      "JOIN watchstations ws ON ws.id = a.station_id "
+                      "JOIN watch_times wt ON wt.id = a.watch_time_id "
+                      "WHERE a.bill_date BETWEEN ? AND ? "
+                      "ORDER BY a.bill_date, ws.display_order, wt.start_minute IS NULL, wt.start_minute, wt.end_minute, wt.id",
+                      (start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')))
+    for bill_date, day_rows in groupby(rows, key=lambda row: row[0]):
+        watchbill_data = {}
+        for _, station, start, end, sailor_id in day_rows:
+            watchbill_data.setdefault(station, {})[watchbill_engine.watch_time_key(start, end)] = sailor_id
+        yield watchbill_engine.parse_date(bill_date), watchbill_data
+
+def get_watch_history(before_date, window_days=30):
+    """Returns (bill_date, sailor_id, start_minute, end_minute, spans_midnight) for saved watches in the
+    window_days before before_date, the watch's stored minute columns rather than its time strings."""
+    return db.query("SELECT a.bill_date, a.sailor_id, wt.start_minute, wt.end_minute, wt.spans_midnight "
+                    "FROM watchbill_assignments a "
+                    "JOIN watch_times wt ON wt.id = a.watch_time_id "
+                    "WHERE a.sailor_id IS NOT NULL AND a.bill_date >= ? AND a.bill_date < ?",
+                    ((before_date - timedelta(days=window_days)).strftime('%Y-%m-%d'), before_date.strftime('%Y-%m-%d')))
+
+def resolve_saved_watchbills(start_date, end_date=None, unavailable=()):
+    """Repairs saved watchbills from start_date to end_date (or onwards) after a leave or roster change.
+
+    Only watches whose sailor is now on leave, in unavailable, or no longer
+    qualified are re-solved; every other saved watch is left alone. Every
+    repaired day is written in one transaction.
+    Returns the number of watches changed.
+    """
+    bill_dates = [watchbill_engine.parse_date(bill_date) for bill_date in db.column(
+        "SELECT DISTINCT bill_date FROM watchbill_assignments WHERE bill_date >= ? AND bill_date <= ? ORDER BY bill_date",
+        (start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d') if end_date else '9999-12-31'))]
+    if not bill_dates:
+        return 0
+
+    watchstations, watchtimes, sailors, leaves = get_watchbill_inputs(bill_dates[0], bill_dates[-1])
+    leave_index = watchbill_engine.LeaveIndex(leaves)
+    eligibility = get_eligibility_index(watchstations, sailors)
+    tally = watchbill_engine.WorkloadTally.from_history(get_watch_history(bill_dates[0]))
+    times_by_key = {watchbill_engine.watch_time_key(start, end): (start, end) for start, end, *_ in watchtimes}
+
+    changed_count = 0
+    with db.transaction():
+        for bill_date in bill_dates:
+            watchbill_data = load_watchbill(bill_date)
+            on_leave = leave_index.unavailable_on(bill_date) | set(unavailable)
+            tally.advance(bill_date)
+            watchbill_data, changed = watchbill_engine.repair_watchbill(watchbill_data, watchtimes, eligibility, on_leave,
+                                                                         tally=tally)
+            tally.add_watchbill(bill_date, watchbill_data, watchtimes)
+            if changed:
+                save_assignments(bill_date, [(station, *times_by_key[key], watchbill_data[station][key])
+                                             for station, key in changed])
+                changed_count += len(changed)
+    return changed_count
@@ -0,0 +1,723 @@
+"""Watchbill generation engine.
+
+Plain functions that build a watchbill from stations, watch times, sailors and
+leave. Nothing in here touches Tk or the database, so the generator can be run
+from the GUI, scripts and batch jobs alike.
+"""
+import random
+from bisect import bisect_right
+from collections import deque
+from datetime import datetime, timedelta
+
+from watchbill_profile import phase_timer
+
+UNASSIGNED = "CLICK TO ASSIGN"
+ROTATING_STATIONS = ("OOD", "Internal Rover")  # Manned watch by watch; every other station keeps one sailor all day
+
+
+def watch_time_key(start, end):
+    """Returns the column key used for a watch time, e.g. "0800 - 1200"."""
+    return f"{start} - {end}"
+
+
+def station_matches(station, qual):
+    """True if a qualification covers a station ("Sentry" covers "Sentry" and "Sentry2")."""
+    return station == qual or (station.startswith(qual) and station[len(qual):].isdigit())
+
+
+def parse_date(value):
+    """Parses a 'YYYY-MM-DD' string from the database into a date."""
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def parse_clock(value):
+    """Parses a watch time like "0800" or "08:00" into minutes since midnight, or None."""
+    digits = value.replace(":", "").strip() if isinstance(value, str) else ""
+    if len(digits) not in (3, 4) or not digits.isdigit():
+        return None
+    hours, minutes = int(digits[:-2]), int(digits[-2:])
+    if hours > 24 or minutes > 59 or (hours == 24 and minutes):  # "2400" is midnight, "2430" is nothing
+        return None
+    return hours * 60 + minutes
+
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def watch_interval(start, end):
+    """Returns (start_minute, end_minute) for a watch, or None if its times cannot be read.
+
+    start_minute is minutes since midnight; end_minute runs past
+    MINUTES_PER_DAY for a watch that crosses midnight, so durations, ordering
+    and overlaps are plain integer arithmetic. An end equal to the start is
+    a 24-hour watch.
+    """
+    start_minute, end_minute = parse_clock(start), parse_clock(end)
+    if start_minute is None or end_minute is None:
+        return None
+    start_minute %= MINUTES_PER_DAY
+    length = (end_minute - start_minute) % MINUTES_PER_DAY or MINUTES_PER_DAY
+    return start_minute, start_minute + length
+
+
+def stored_interval(start_minute, end_minute, spans_midnight):
+    """watch_interval() rebuilt from the minute columns watchbill_db stores, or None if they are NULL."""
+    if start_minute is None or end_minute is None:
+        return None
+    if spans_midnight or end_minute <= start_minute:
+        end_minute += MINUTES_PER_DAY
+    return start_minute, end_minute
+
+
+def watch_intervals(watchtimes):
+    """Returns watch_interval() for each watch time.
+
+    Rows may be (start, end) strings or, as watchbill_db loads them, (start,
+    end, start_minute, end_minute, spans_midnight); the stored minutes are
+    used as they are instead of parsing the strings again.
+    """
+    return [stored_interval(*row[2:5]) if len(row) > 2 else watch_interval(*row) for row in watchtimes]
+
+
+def watch_minutes(start, end):
+    """Length of a watch in minutes (wrapping past midnight), or 0 if the times cannot be read."""
+    interval = watch_interval(start, end)
+    return interval[1] - interval[0] if interval else 0
+
+
+def slot_overlaps(watchtimes):
+    """Returns, for each watch, a bitmask of the watches whose real times overlap it (itself included).
+
+    Watches running past midnight are handled, and back-to-back watches do not
+    overlap. A watch whose times cannot be read only overlaps itself.
+    """
+    intervals = watch_intervals(watchtimes)
+
+    overlaps = []
+    for i, first in enumerate(intervals):
+        mask = 1 << i
+        if first is not None:
+            for j, second in enumerate(intervals):
+                if j == i or second is None:
+                    continue
+                for shift in (-MINUTES_PER_DAY, 0, MINUTES_PER_DAY):  # Compare across midnight as well
+                    if first[0] < second[1] + shift and second[0] + shift < first[1]:
+                        mask |= 1 << j
+                        break
+        overlaps.append(mask)
+    return overlaps
+
+
+class IntervalTree:
+    """Static centred interval tree over (start, end, value) triples with inclusive integer ends.
+
+    Each node keeps the intervals containing its centre, sorted by start and
+    by end, so overlapping(first, last) walks one root-to-leaf path per side
+    and costs O(log n + hits) rather than a test of every interval.
+    """
+
+    def __init__(self, intervals):
+        self._root = self._build(sorted(intervals, key=lambda interval: interval[:2]))
+
+    def _build(self, intervals):
+        if not intervals:
+            return None
+        center = intervals[len(intervals) // 2][0]  # Median start, so the tree stays balanced
+        left, here, right = [], [], []
+        for interval in intervals:
+            if interval[1] < center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        by_end = sorted(here, key=lambda interval: -interval[1])
+        return center, here, by_end, self._build(left), self._build(right)
+
+    def overlapping(self, first, last):
+        """Returns the values of the intervals sharing at least one point with [first, last]."""
+        found = []
+        nodes = [self._root]
+        while nodes:
+            node = nodes.pop()
+            if node is None:
+                continue
+            center, by_start, by_end, left, right = node
+            if last < center:  # Every interval here reaches the centre, so only its start matters
+                for start, _, value in by_start:
+                    if start > last:
+                        break
+                    found.append(value)
+                nodes.append(left)
+            elif first > center:  # Likewise only its end
+                for _, end, value in by_end:
+                    if end < first:
+                        break
+                    found.append(value)
+                nodes.append(right)
+            else:
+                found.extend(value for _, _, value in by_start)
+                nodes.append(left)
+                nodes.append(right)
+        return found
+
+
+class LeaveIndex:
+    """Leave intervals per sailor, merged and sorted for logarithmic lookups.
+
+    Built once from (sailor, start_date, end_date) rows; dates are parsed a
+    single time and kept as ordinals. is_unavailable() is one bisect in the
+    sailor's own intervals; "who is away on day D" goes through an
+    IntervalTree of every merged interval, so it costs the number of sailors
+    away rather than the number who have any leave at all.
+    """
+
+    def __init__(self, leaves):
+        by_sailor = {}
+        for sailor, start_date, end_date in leaves:
+            by_sailor.setdefault(sailor, []).append(
+                (parse_date(start_date).toordinal(), parse_date(end_date).toordinal()))
+
+        self._starts = {}
+        self._ends = {}
+        everyone = []
+        for sailor, intervals in by_sailor.items():
+            intervals.sort()
+            merged = []
+            for start, end in intervals:
+                if merged and start <= merged[-1][1] + 1:  # Overlapping or back-to-back leave
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            self._starts[sailor] = [start for start, _ in merged]
+            self._ends[sailor] = [end for _, end in merged]
+            everyone.extend((start, end, sailor) for start, end in merged)
+        self._tree = IntervalTree(everyone)
+
+    def is_unavailable(self, sailor, first_day, last_day=None):
+        """True if the sailor has leave on any day from first_day to last_day (inclusive)."""
+        starts = self._starts.get(sailor)
+        if not starts:
+            return False
+        last_day = last_day or first_day
+        i = bisect_right(starts, last_day.toordinal()) - 1
+        return i >= 0 and self._ends[sailor][i] >= first_day.toordinal()
+
+    def unavailable_on(self, day):
+        """Returns the sailors on leave on the given day."""
+        return self.unavailable_between(day, day)
+
+    def unavailable_between(self, first_day, last_day):
+        """Returns the sailors with any leave from first_day to last_day (inclusive)."""
+        return set(self._tree.overlapping(first_day.toordinal(), last_day.toordinal()))
+
+
+class WorkloadTally:
+    """Running count of watches and minutes stood per sailor over a rolling window of days.
+
+    Days are added in date order and fall out of the window as generation
+    moves forward, so a sailor's load is a dict lookup rather than a
+    re-aggregation of history.
+    """
+
+    def __init__(self, window_days=30):
+        self.window_days = window_days
+        self._days = deque()  # (ordinal, {sailor: (watches, minutes)}) in date order
+        self.watches = {}
+        self.minutes = {}
+
+    def add_day(self, day, stood):
+        """Records {sailor: (watches, minutes)} stood on day."""
+        self._days.append((day.toordinal(), stood))
+        for sailor, (watches, minutes) in stood.items():
+            self.watches[sailor] = self.watches.get(sailor, 0) + watches
+            self.minutes[sailor] = self.minutes.get(sailor, 0) + minutes
+
+    def add_watchbill(self, day, watchbill_data, watchtimes):
+        """Records everything stood on a generated watchbill."""
+        lengths = [(watch_time_key(*row[:2]), interval[1] - interval[0] if interval else 0)
+                   for row, interval in zip(watchtimes, watch_intervals(watchtimes))]
+        stood = {}
+        for row in watchbill_data.values():
+            for key, length in lengths:
+                sailor = row.get(key)
+                if sailor is not None:
+                    watches, minutes = stood.get(sailor, (0, 0))
+                    stood[sailor] = (watches + 1, minutes + length)
+        self.add_day(day, stood)
+
+    def advance(self, day):
+        """Drops days that fall outside the window ending the day before day."""
+        oldest = day.toordinal() - self.window_days
+        while self._days and self._days[0][0] < oldest:
+            _, stood = self._days.popleft()
+            for sailor, (watches, minutes) in stood.items():
+                self.watches[sailor] -= watches
+                self.minutes[sailor] -= minutes
+
+    def load(self, sailor):
+        """Sort key for a sailor's recent load: minutes stood, then watches stood."""
+        return self.minutes.get(sailor, 0), self.watches.get(sailor, 0)
+
+    @classmethod
+    def from_history(cls, history, window_days=30):
+        """Builds a tally from watchbill_db.get_watch_history() rows of saved watchbills.
+
+        Rows are (bill_date, sailor, start_minute, end_minute, spans_midnight),
+        the stored minutes of each watch time, so no time string is parsed.
+        """
+        lengths = {}  # Stored minutes -> watch length, worked out once per distinct watch time
+        by_day = {}
+        for bill_date, sailor, start_minute, end_minute, spans_midnight in history:
+            stored = (start_minute, end_minute, spans_midnight)
+            if stored not in lengths:
+                interval = stored_interval(*stored)
+                lengths[stored] = interval[1] - interval[0] if interval else 0
+            stood = by_day.setdefault(bill_date, {})
+            watches, minutes = stood.get(sailor, (0, 0))
+            stood[sailor] = (watches + 1, minutes + lengths[stored])
+        tally = cls(window_days)
+        for bill_date in sorted(by_day):
+            tally.add_day(parse_date(bill_date), by_day[bill_date])
+        return tally
+
+
+def qualification_bits(sailors):
+    """Gives every qualification name held by a sailor its own bit.
+
+    Returns (bits, masks): bits maps qualification name to bit position and
+    masks is a list of (sailor_id, mask) in roster order, so eligibility is a
+    single AND against a station's mask.
+    """
+    bits = {}
+    masks = []
+    for sailor_id, _, _, quals in sailors:
+        mask = 0
+        for qual in quals.split(',') if quals else ():
+            mask |= 1 << bits.setdefault(qual, len(bits))
+        masks.append((sailor_id, mask))
+    return bits, masks
+
+
+def station_base_names(station):
+    """Returns every qualification name that covers a station under station_matches().
+
+    That is the station itself plus each prefix followed only by digits, so
+    "Sentry12" gives {"Sentry12", "Sentry1", "Sentry"}.
+    """
+    names = {station}
+    i = len(station)
+    while i > 0 and station[i - 1].isdigit():
+        i -= 1
+        names.add(station[:i])
+    return names
+
+
+def station_mask(station, bits):
+    """Returns the mask of every qualification that covers the station."""
+    mask = 0
+    for qual in station_base_names(station):
+        if qual in bits:
+            mask |= 1 << bits[qual]
+    return mask
+
+
+class EligibilityIndex:
+    """Station -> qualified sailors, compiled once from the roster.
+
+    The prefix/digit qualification rule is resolved per station a single time;
+    after that generation and the manual pick list just read the list.
+    Rebuild it whenever sailors, qualifications or stations change.
+    """
+
+    def __init__(self, watchstations, sailors):
+        self.bits, self._masks = qualification_bits(sailors)
+        self.names = {sailor_id: f"{rank} {last_name}" for sailor_id, rank, last_name, _ in sailors}
+        self._by_station = {}
+        for station in watchstations:
+            self.eligible(station)
+
+    def eligible(self, station):
+        """Returns the ids of the sailors qualified for a station, in roster order."""
+        if station not in self._by_station:
+            required = station_mask(station, self.bits)
+            self._by_station[station] = [sailor for sailor, mask in self._masks if mask & required]
+        return self._by_station[station]
+
+
+def _assign_day(watchstations, watchtimes, eligibility, on_leave, rng, tally):
+    """Fills one day's watchbill from the eligibility index, least recently loaded sailor first.
+
+    Each sailor's watches are tracked as a bitmask, so nobody is picked for a
+    watch that overlaps one they already hold.
+    """
+    def pick(qualified_sailors):
+        return min(qualified_sailors, key=lambda sailor: (tally.load(sailor), rng.random()))
+
+    keys = [watch_time_key(start, end) for start, end, *_ in watchtimes]
+    overlaps = slot_overlaps(watchtimes)
+    all_day = (1 << len(keys)) - 1
+    busy = {}  # sailor -> bitmask of watches held
+    watchbill_data = {}
+    assigned_ood = set()
+
+    for station in watchstations:
+        watchbill_data[station] = dict.fromkeys(keys)
+        candidates = [sailor for sailor in eligibility.eligible(station) if sailor not in on_leave]
+        if station not in ROTATING_STATIONS:  # Same sailor stands every watch at other stations
+            qualified_sailors = [sailor for sailor in candidates if not busy.get(sailor, 0)]
+            if qualified_sailors:
+                chosen_sailor = pick(qualified_sailors)
+                watchbill_data[station] = dict.fromkeys(keys, chosen_sailor)
+                busy[chosen_sailor] = all_day
+        else:
+            for slot, key in enumerate(keys):
+                qualified_sailors = [sailor for sailor in candidates
+                                     if not busy.get(sailor, 0) & overlaps[slot]
+                                     and (station != "OOD" or sailor not in assigned_ood)]
+                if qualified_sailors:
+                    chosen_sailor = pick(qualified_sailors)
+                    watchbill_data[station][key] = chosen_sailor
+                    busy[chosen_sailor] = busy.get(chosen_sailor, 0) | 1 << slot
+                    if station == "OOD":
+                        assigned_ood.add(chosen_sailor)
+
+    return watchbill_data
+
+
+def split_units(watchbill_data, keys, by_cell=False):
+    """Splits a watchbill into units: (station, None) for an all-day station, (station, slot) otherwise.
+
+    An all-day station whose row was edited to mix sailors, or every station
+    when by_cell is set, is split into one unit per watch.
+    Returns {unit: sailor or None}.
+    """
+    holder = {}
+    for station, row in watchbill_data.items():
+        values = [row.get(key) for key in keys]
+        if not by_cell and station not in ROTATING_STATIONS and len(set(values)) == 1:
+            holder[(station, None)] = values[0]
+        else:
+            for slot, value in enumerate(values):
+                holder[(station, slot)] = value
+    return holder
+
+
+def join_units(holder, keys, stations):
+    """Turns split_units() output back into {station: {time_key: sailor or None}}."""
+    watchbill_data = {station: dict.fromkeys(keys) for station in stations}
+    for (station, slot), sailor in holder.items():
+        if slot is None:
+            watchbill_data[station] = dict.fromkeys(keys, sailor)
+        else:
+            watchbill_data[station][keys[slot]] = sailor
+    return watchbill_data
+
+
+class Occupancy:
+    """Mutable unit -> sailor assignment with a per-sailor watch bitmask for O(1) conflict checks.
+
+    overlaps is slot_overlaps() for the day's watch times; without it watches
+    only clash with themselves.
+    """
+
+    def __init__(self, holder, n_slots, overlaps=None):
+        self.holder = dict(holder)
+        self.n_slots = n_slots
+        self.overlaps = overlaps or [1 << slot for slot in range(n_slots)]
+        self._all_day = (1 << n_slots) - 1
+        self._all_day_reach = 0
+        for mask in self.overlaps:
+            self._all_day_reach |= mask
+        self.held = {}  # sailor -> set of units
+        self.busy = {}  # sailor -> bitmask of watches held
+        for unit, sailor in self.holder.items():
+            if sailor is not None:
+                self._take(sailor, unit)
+
+    def slots(self, unit):
+        return range(self.n_slots) if unit[1] is None else (unit[1],)
+
+    def mask(self, unit):
+        """Bitmask of the watches a unit covers."""
+        return self._all_day if unit[1] is None else 1 << unit[1]
+
+    def reach(self, unit):
+        """Bitmask of the watches that clash with a unit."""
+        return self._all_day_reach if unit[1] is None else self.overlaps[unit[1]]
+
+    def _take(self, sailor, unit):
+        self.holder[unit] = sailor
+        self.held.setdefault(sailor, set()).add(unit)
+        self.busy[sailor] = self.busy.get(sailor, 0) | self.mask(unit)
+
+    def _release(self, sailor, unit):
+        self.holder[unit] = None
+        self.held[sailor].discard(unit)
+        busy = 0
+        for other in self.held[sailor]:
+            busy |= self.mask(other)
+        self.busy[sailor] = busy
+
+    def blockers(self, sailor, unit):
+        """Returns the units sailor would have to give up to stand unit."""
+        blocking = set()
+        reach = self.reach(unit)
+        if self.busy.get(sailor, 0) & reach:
+            blocking.update(other for other in self.held[sailor] if self.mask(other) & reach)
+        if unit[0] == "OOD":  # One OOD watch per sailor per day
+            blocking.update(other for other in self.held.get(sailor, ()) if other[0] == "OOD")
+        blocking.discard(unit)
+        return blocking
+
+    def can_take(self, sailor, unit, vacating):
+        """True if sailor could stand unit once the units in vacating are given up."""
+        return self.blockers(sailor, unit) <= set(vacating)
+
+    def move(self, unit, sailor):
+        """Puts sailor (or None) on unit."""
+        current = self.holder[unit]
+        if current is not None:
+            self._release(current, unit)
+        if sailor is not None:
+            self._take(sailor, unit)
+
+
+def _unit_key(unit):
+    """Sort key that orders units the same way on every run (sets of units are not)."""
+    return unit[0], -1 if unit[1] is None else unit[1]
+
+
+def _match_day(watchstations, watchtimes, eligibility, on_leave, rng, tally):
+    """Fills one day's watchbill with augmenting paths instead of greedy picks.
+
+    Every all-day station, OOD watch and Internal Rover watch is a unit
+    needing a sailor, and a sailor may hold several units as long as none of
+    them clash (Occupancy.blockers(): real watch times, one OOD watch a day,
+    and nothing beside an all-day station). Units are seated in order of the
+    watches they cover, so all-day stations go first whatever the display
+    order, then the single watches. Each one takes a free sailor if it can;
+    otherwise a sailor is moved onto it and the units they had to give up are
+    re-seated the same way, recursively. A change that cannot be completed is
+    undone, so a seated unit is never left empty and the bill only gains cells.
+    As in Hopcroft-Karp, each round runs one search per empty unit and the
+    searches share one visited set, so a round tries every move at most once;
+    rounds repeat while they gain cells, which keeps short-handed days fast.
+
+    Free candidates are tried least recently loaded first (ties broken at
+    random), preferring whoever holds the fewest units today, so the watches
+    are spread across the roster.
+    """
+    keys = [watch_time_key(start, end) for start, end, *_ in watchtimes]
+    order = {}  # sailor -> sort key, drawn once per day
+
+    def by_load(eligible):
+        for sailor in eligible:
+            if sailor not in order:
+                order[sailor] = (tally.load(sailor), rng.random())
+        return sorted(eligible, key=order.__getitem__)
+
+    candidates = {}
+    for station in watchstations:
+        eligible = by_load([sailor for sailor in eligibility.eligible(station) if sailor not in on_leave])
+        if station in ROTATING_STATIONS:
+            for slot in range(len(keys)):
+                candidates[(station, slot)] = eligible
+        else:
+            candidates[(station, None)] = eligible
+    units = sorted(candidates, key=lambda unit: unit[1] is not None)  # All-day first, display order within each
+    bill = Occupancy(dict.fromkeys(units), len(keys), slot_overlaps(watchtimes))
+    filled = [0]  # Cells manned so far
+
+    def weight(unit):
+        return len(keys) if unit[1] is None else 1
+
+    def move(unit, sailor, undo):
+        previous = bill.holder[unit]
+        undo.append((unit, previous))
+        filled[0] += weight(unit) * ((sailor is not None) - (previous is not None))
+        bill.move(unit, sailor)
+
+    def rollback(undo, mark):
+        while len(undo) > mark:
+            unit, previous = undo.pop()
+            filled[0] += weight(unit) * ((previous is not None) - (bill.holder[unit] is not None))
+            bill.move(unit, previous)
+
+    def seat(unit, visited, undo):
+        """Mans an empty unit without emptying more cells than it fills; returns True if it worked.
+
+        visited holds the moves already tried in this round, and units that
+        could not be manned at all, so no search repeats another's work.
+        """
+        if bill.holder[unit] is not None:
+            return False
+        free = [sailor for sailor in candidates[unit] if not bill.blockers(sailor, unit)]
+        if free:
+            move(unit, min(free, key=lambda sailor: (len(bill.held.get(sailor, ())), order[sailor])), undo)
+            return True
+        target = filled[0] + weight(unit)
+        for sailor in candidates[unit]:
+            if (sailor, unit) in visited:  # Each move is tried once per round
+                continue
+            visited.add((sailor, unit))
+            mark = len(undo)
+            displaced = sorted(bill.blockers(sailor, unit), key=_unit_key)
+            for other in displaced:
+                move(other, None, undo)
+            move(unit, sailor, undo)
+            for other in displaced:
+                # Re-seat what the sailor gave up, or man another empty unit worth as much instead
+                if not seat(other, visited, undo):
+                    any(seat(spare, visited, undo) for spare in units
+                        if bill.holder[spare] is None and weight(spare) >= weight(other))
+            if filled[0] >= target:
+                return True
+            rollback(undo, mark)
+        return False
+
+    seated = True
+    while seated:  # One search per empty unit per round, sharing visited; go round again while that gains cells
+        seated = False
+        visited = set()
+        for unit in units:
+            if bill.holder[unit] is None and seat(unit, visited, []):
+                seated = True
+    return join_units(bill.holder, keys, watchstations)
+
+
+SOLVERS = {
+    "greedy": _assign_day,  # One pass, least loaded qualified sailor per watch; never moves anyone
+    "matching": _match_day,
+}
+
+
+def repair_watchbill(watchbill_data, watchtimes, eligibility, on_leave, rng=None, tally=None, max_depth=2):
+    """Re-solves only the watches a leave or roster change has invalidated.
+
+    A watch is invalid when its sailor is now in on_leave or no longer
+    eligible for the station. Those watches are cleared and refilled from free,
+    least-loaded sailors; when nobody is free, at most max_depth other watches
+    are handed on along a chain to make room. Everything else is left exactly
+    as it was. Watches that were already unassigned are not touched.
+    Returns (watchbill_data, changed) where changed lists (station, time_key).
+    """
+    rng = rng or random
+    tally = tally or WorkloadTally()
+    keys = [watch_time_key(start, end) for start, end, *_ in watchtimes]
+    stations = list(watchbill_data)
+    bill = Occupancy(split_units(watchbill_data, keys), len(keys), slot_overlaps(watchtimes))
+    qualified = {station: set(eligibility.eligible(station)) - set(on_leave) for station in stations}
+
+    vacated = [unit for unit, sailor in bill.holder.items()
+               if sailor is not None and sailor not in qualified[unit[0]]]
+    if not vacated:
+        return watchbill_data, []
+    for unit in vacated:
+        bill.move(unit, None)
+
+    order = {}
+
+    def candidates(unit):
+        pool = qualified[unit[0]]
+        for sailor in pool:
+            if sailor not in order:
+                order[sailor] = (tally.load(sailor), rng.random())
+        return sorted(pool, key=order.__getitem__)
+
+    def reseat(unit, depth, visited):
+        for sailor in candidates(unit):
+            if sailor in visited:
+                continue
+            blocking = bill.blockers(sailor, unit)
+            if not blocking:
+                bill.move(unit, sailor)
+                return True
+            if depth == 0 or len(blocking) > 1:
+                continue
+            blocker = blocking.pop()
+            visited.add(sailor)
+            bill.move(blocker, None)
+            bill.move(unit, sailor)
+            if reseat(blocker, depth - 1, visited):
+                return True
+            bill.move(unit, None)
+            bill.move(blocker, sailor)
+        return False
+
+    for depth in range(max_depth + 1):  # Prefer free sailors over chains of hand-offs
+        for unit in vacated:
+            if bill.holder[unit] is None:
+                reseat(unit, depth, set())
+
+    repaired = join_units(bill.holder, keys, stations)
+    changed = [(station, key) for station in stations for key in keys
+               if repaired[station].get(key) != watchbill_data[station].get(key)]
+    return repaired, changed
+
+
+def create_watchbill(selected_date, watchstations, watchtimes, sailors, leaves, **options):
+    """Generates the watchbill for a single day.
+
+    watchstations is a list of station names in display order, watchtimes a
+    list of (start, end) pairs or watchbill_db rows (see watch_intervals()),
+    sailors a list of (sailor_id, rank, last_name,
+    qualifications) rows and leaves a list of (sailor_id, start_date, end_date)
+    rows. Accepts the same options as create_watchbills().
+    Returns {station: {time_key: sailor_id or None}}.
+    """
+    for _, watchbill_data in create_watchbills(selected_date, selected_date, watchstations, watchtimes,
+                                               sailors, leaves, **options):
+        return watchbill_data
+
+
+def create_watchbills(start_date, end_date, watchstations, watchtimes, sailors, leaves, rng=None, eligibility=None,
+                      method="matching", optimize_ms=0, optimize_moves=None, preferences=None, tally=None,
+                      profiler=None):
+    """Generates one watchbill per day from start_date to end_date inclusive.
+
+    Takes the same inputs as create_watchbill(), but builds the leave index and
+    eligibility index once for the whole range. A cached EligibilityIndex for
+    the same roster may be passed in, and method picks one of SOLVERS. With
+    optimize_ms each day is then improved by watchbill_optimizer for that long,
+    or for optimize_moves moves when a seeded rng must give repeatable bills.
+    tally is a WorkloadTally of watches already stood (see
+    WorkloadTally.from_history()); sailors with less recent load are picked
+    first, and each generated day is added to it as the range moves forward.
+    profiler is an optional watchbill_profile.Profiler that is given the
+    availability, eligibility and assignment phases of each day.
+    Yields (date, watchbill_data) pairs in date order.
+    """
+    rng = rng or random
+    tally = tally or WorkloadTally()
+    solve = SOLVERS[method]
+    timed = phase_timer(profiler)
+    with timed("availability"):
+        leave_index = LeaveIndex(leaves)
+    with timed("eligibility"):
+        eligibility = eligibility or EligibilityIndex(watchstations, sailors)
+    if optimize_ms or optimize_moves:
+        from watchbill_optimizer import optimize_watchbill  # Imports this module, so load it late
+    day = start_date
+    while day <= end_date:
+        with timed("availability"):
+            on_leave = leave_index.unavailable_on(day)
+        with timed("assignment"):
+            tally.advance(day)
+            watchbill_data = solve(watchstations, watchtimes, eligibility, on_leave, rng, tally)
+            if optimize_ms or optimize_moves:
+                watchbill_data, _ = optimize_watchbill(watchbill_data, watchtimes, eligibility, on_leave,
+                                                       budget_ms=optimize_ms, preferences=preferences, rng=rng,
+                                                       moves=optimize_moves)
+            tally.add_watchbill(day, watchbill_data, watchtimes)
+        yield day, watchbill_data
+        day += timedelta(days=1)
+
+
+def format_watchbill(watchbill_data, sailors):
+    """Replaces sailor ids in a generated watchbill with "RANK Name" display strings."""
+    sailor_data = {sailor_id: f"{rank} {last_name}" for sailor_id, rank, last_name, _ in sailors}
+    return {
+        station: {key: sailor_data.get(sailor, UNASSIGNED) for key, sailor in row.items()}
+        for station, row in watchbill_data.items()
+    }
@@ -0,0 +1,144 @@
+"""Exporters for watchbills: CSV, XLSX and print-ready PDF/PNG.
+
+Every exporter takes an iterable of (day, watchbill_data) pairs, usually
+watchbill_db.iter_saved_watchbills(), and writes each bill as it arrives, so
+exporting a year of bills never holds more than one of them in memory.
+openpyxl (XLSX) and matplotlib (PDF/PNG) are only imported when used.
+leave_list_lines() formats the leave list shown in the application.
+"""
+import csv
+import os
+from datetime import date
+
+import watchbill_engine
+
+
+def watchbill_rows(watchbill_data, watchtimes, sailors):
+    """Yields [station, "RANK Name" or "" per watch time] for one watchbill."""
+    keys = [watchbill_engine.watch_time_key(start, end) for start, end, *_ in watchtimes]
+    names = {sailor_id: f"{rank} {last_name}" for sailor_id, rank, last_name, _ in sailors}
+    for station, row in watchbill_data.items():
+        yield [station] + [names.get(row.get(key), "") for key in keys]
+
+
+def header_row(watchtimes):
+    return ["Watch Station"] + [watchbill_engine.watch_time_key(start, end) for start, end, *_ in watchtimes]
+
+
+LEAVE_COLUMNS = [("ID", 5), ("RANK", 5), ("NAME", 15), ("START DATE", 15), ("END DATE", 15), ("TYPE", 15),
+                 ("NOTES", 30)]  # (header, width) of the fixed-width Leave/Availability list
+
+
+def leave_list_lines(leaves):
+    """Returns the Leave/Availability list as fixed-width lines for a Courier font, header first.
+
+    leaves are watchbill_db.get_leaves() rows; dates are shown as 02 Nov 2026.
+    """
+    def line(values):
+        return "".join(f"{value:<{width}}" for value, (_, width) in zip(values, LEAVE_COLUMNS))
+
+    def shown(day):
+        return date.fromisoformat(day).strftime("%d %b %Y")
+
+    lines = [line(header for header, _ in LEAVE_COLUMNS)]
+    for leave_id, _, last_name, start_date, end_date, leave_type, notes, rank in leaves:
+        lines.append(line((leave_id, rank, last_name, shown(start_date), shown(end_date), leave_type, notes)))
+    return lines
+
+
+def export_csv(path, bills, watchtimes, sailors):
+    """Writes all bills to one CSV, one row per station per day. Returns the number of bills written."""
+    count = 0
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Date"] + header_row(watchtimes))
+        for day, watchbill_data in bills:
+            day_str = day.strftime('%Y-%m-%d')
+            writer.writerows([day_str] + row for row in watchbill_rows(watchbill_data, watchtimes, sailors))
+            count += 1
+    return count
+
+
+def export_xlsx(path, bills, watchtimes, sailors):
+    """Writes one worksheet per day to an XLSX workbook. Returns the number of bills written."""
+    from openpyxl import Workbook  # Optional dependency, only needed for XLSX
+
+    workbook = Workbook(write_only=True)  # Write-only mode streams rows to disk instead of keeping cells
+    count = 0
+    for day, watchbill_data in bills:
+        sheet = workbook.create_sheet(title=day.strftime('%Y-%m-%d'))
+        sheet.append(header_row(watchtimes))
+        for row in watchbill_rows(watchbill_data, watchtimes, sailors):
+            sheet.append(row)
+        count += 1
+    if not count:
+        workbook.create_sheet(title="Watchbill").append(header_row(watchtimes))
+    workbook.save(path)
+    return count
+
+
+def render_watchbill(day, watchbill_data, watchtimes, sailors):
+    """Draws one watchbill as a landscape letter page; returns a matplotlib Figure."""
+    from matplotlib.figure import Figure  # Optional dependency, only needed for PDF/PNG
+
+    figure = Figure(figsize=(11, 8.5))
+    axes = figure.add_subplot()
+    axes.axis("off")
+    axes.set_title(f"Watchbill - {day.strftime('%A %d %B %Y')}", fontsize=14, fontweight="bold")
+    rows = list(watchbill_rows(watchbill_data, watchtimes, sailors))
+    if rows:
+        table = axes.table(cellText=rows, colLabels=header_row(watchtimes), loc="upper center", cellLoc="center")
+        table.auto_set_font_size(False)
+        table.set_fontsize(9)
+        table.scale(1, 1.6)
+        for (row, _), cell in table.get_celld().items():
+            if row == 0:
+                cell.set_text_props(fontweight="bold")
+                cell.set_facecolor("#d9d9d9")
+    return figure
+
+
+def export_pdf(path, bills, watchtimes, sailors):
+    """Writes one page per day to a PDF. Returns the number of bills written."""
+    from matplotlib.backends.backend_pdf import PdfPages  # Optional dependency, only needed for PDF
+
+    count = 0
+    with PdfPages(path) as pdf:
+        for day, watchbill_data in bills:
+            pdf.savefig(render_watchbill(day, watchbill_data, watchtimes, sailors))
+            count += 1
+    return count
+
+
+def export_png(path, bills, watchtimes, sailors):
+    """Writes one PNG per day, named <path stem>-YYYY-MM-DD.png. Returns the number of bills written."""
+    stem, _ = os.path.splitext(path)
+    count = 0
+    for day, watchbill_data in bills:
+        figure = render_watchbill(day, watchbill_data, watchtimes, sailors)
+        figure.savefig(f"{stem}-{day.strftime('%Y-%m-%d')}.png", dpi=150)
+        count += 1
+    return count
+
+
+EXPORTERS = {"csv": export_csv, "xlsx": export_xlsx, "pdf": export_pdf, "png": export_png}
+OPTIONAL_MODULES = {"xlsx": "openpyxl", "pdf": "matplotlib", "png": "matplotlib"}
+
+
+def check_format(file_format):
+    """Raises ValueError for an unknown format, or ImportError if its optional dependency is missing."""
+    if file_format not in EXPORTERS:
+        raise ValueError(f"Unsupported export format '{file_format}' (use {', '.join(EXPORTERS)})")
+    module = OPTIONAL_MODULES.get(file_format)
+    if module:
+        try:
+            __import__(module)
+        except ImportError:
+            raise ImportError(f"Exporting to {file_format.upper()} needs the '{module}' package (pip install {module})")
+
+
+def export_watchbills(path, bills, watchtimes, sailors, file_format=None):
+    """Exports bills using the exporter for file_format, or for path's extension if not given."""
+    file_format = (file_format or os.path.splitext(path)[1].lstrip(".")).lower()
+    check_format(file_format)  # Fail before any bill is read, not part way through
+    return EXPORTERS[file_format](path, bills, watchtimes, sailors)
@@ -0,0 +1,285 @@
+"""Bulk import of sailors, qualification assignments and leave from CSV or XLSX.
+
+Each CSV file holds one kind of row, recognised from its header (or given
+explicitly); an XLSX workbook may hold all three, one kind per sheet, named
+after the kind:
+
+    sailors          rank, last_name[, qualifications]        (qualifications separated by ';' or ',')
+    qualifications   last_name or sailor_id, qualification    (one assignment per row)
+    leave            last_name or sailor_id, start_date, end_date, type[, notes]
+
+Every row of every file is checked before anything is written, and errors
+are reported with the file and line number. Two sailors may share a last
+name. A sailors row whose rank and last name match a sailor already on the
+roster adds any new qualifications to that sailor instead of a second
+sailor, so importing a file again changes nothing. Qualification and leave
+rows refer to a sailor by last name, or by sailor_id when the name is
+shared; an ambiguous name is rejected rather than guessed at. A clean
+import is loaded in a single transaction; a file with errors loads nothing.
+openpyxl is only imported for XLSX files.
+"""
+import csv
+import os
+from datetime import date, datetime
+
+import watchbill_db
+
+KINDS = ("sailors", "qualifications", "leave")
+REQUIRED_COLUMNS = {
+    "sailors": ("rank", "last_name"),
+    "qualifications": ("last_name", "qualification"),  # Either last_name or sailor_id names the sailor
+    "leave": ("last_name", "start_date", "end_date", "type"),
+}
+COLUMN_ALIASES = {
+    "name": "last_name", "lastname": "last_name", "sailor": "last_name", "id": "sailor_id",
+    "quals": "qualifications", "qual": "qualification",
+    "start": "start_date", "from": "start_date", "end": "end_date", "to": "end_date",
+    "leave_type": "type", "note": "notes",
+}
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%d %b %Y")  # ISO, spreadsheet US style, and the leave window's display
+
+
+class RosterImportError(ValueError):
+    """Raised when import rows fail validation; errors lists "file line N: problem" strings."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} problem(s) found, nothing was imported:\n" + "\n".join(errors[:20])
+                         + (f"\n... and {len(errors) - 20} more" if len(errors) > 20 else ""))
+
+
+def normalize_column(name):
+    """Turns a header cell like "Last Name" into "last_name", resolving aliases."""
+    key = str(name or "").strip().lower().replace(" ", "_").replace("-", "_")
+    return COLUMN_ALIASES.get(key, key)
+
+
+def detect_kind(columns):
+    """Guesses the kind of rows from a normalised header, or returns None."""
+    if "start_date" in columns or "end_date" in columns:
+        return "leave"
+    if "rank" in columns:
+        return "sailors"
+    if "qualification" in columns:
+        return "qualifications"
+    return None
+
+
+def _cell(value):
+    """Normalises a cell to a stripped string, leaving dates from XLSX alone."""
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value
+    return str(value).strip()
+
+
+def _table(source, numbered_rows, kind):
+    """Turns (line, values) rows, header first, into [(source, kind, columns, [(line, record)])]."""
+    numbered_rows = iter(numbered_rows)
+    for _, header in numbered_rows:
+        if any(_cell(value) for value in header):
+            break
+    else:
+        return []
+    columns = [normalize_column(value) for value in header]
+    records = []
+    for line, values in numbered_rows:
+        values = [_cell(value) for value in values]
+        if any(values):
+            records.append((line, dict(zip(columns, values))))
+    return [(source, kind or detect_kind(columns), columns, records)]
+
+
+def _csv_lines(reader):
+    """Yields (line, values), counting physical lines so quoted newlines do not throw the numbers off."""
+    line = 1
+    for values in reader:
+        yield line, values
+        line = reader.line_num + 1
+
+
+def read_tables(path, kind=None):
+    """Reads a CSV or XLSX file into (source, kind, columns, [(line, record)]) tables.
+
+    Line numbers match a text editor for CSV and the worksheet row for XLSX.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    name = os.path.basename(path)
+    if extension == ".xlsx":
+        try:
+            from openpyxl import load_workbook  # Optional dependency, only needed for XLSX
+        except ImportError:
+            raise ImportError("Importing XLSX needs the 'openpyxl' package (pip install openpyxl)")
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            tables = []
+            for sheet in workbook.worksheets:
+                title = sheet.title.strip().lower()
+                tables += _table(f"{name} [{sheet.title}]", enumerate(sheet.iter_rows(values_only=True), start=1),
+                                 kind or (title if title in KINDS else None))
+            return tables
+        finally:
+            workbook.close()
+    if extension != ".csv":
+        raise ValueError(f"Unsupported import file '{name}' (use .csv or .xlsx)")
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return _table(name, _csv_lines(csv.reader(f)), kind)
+
+
+def parse_date(value):
+    """Returns a date from an XLSX date cell or a string in one of DATE_FORMATS, or None."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            pass
+    return None
+
+
+def split_qualifications(value):
+    return [qual.strip() for qual in str(value).replace(";", ",").split(",") if qual.strip()]
+
+
+def validate(tables, existing_sailors=()):
+    """Checks every record of every table.
+
+    existing_sailors are watchbill_db.get_sailors() rows (sailor_id, rank,
+    last_name, qualifications) for the sailors already in the database.
+    Returns (sailors, qualifications, leaves) ready for
+    watchbill_db.bulk_import(), or raises RosterImportError listing every
+    problem found. Qualifications and leave for a sailor in the same import
+    travel with that sailor's row, since they have no id yet.
+    """
+    errors = []
+    by_name = {}  # Last name -> existing sailor ids and new sailor rows
+    on_roster = {}  # (rank, last name) -> existing (sailor id, qualifications)
+    for sailor_id, rank, last_name, quals in existing_sailors:
+        by_name.setdefault(last_name, []).append(sailor_id)
+        on_roster.setdefault((rank, last_name), []).append((sailor_id, split_qualifications(quals)))
+    existing_ids = {sailor_id for sailor_id, *_ in existing_sailors}
+    listed = {}  # (rank, last name) -> where the import first lists that sailor
+    sailors, qualifications, leaves = [], [], []
+
+    def resolve(where, record):
+        """Returns an existing sailor id or a new sailor row for the record's sailor, or None after an error."""
+        last_name, sailor_id = record.get("last_name", ""), str(record.get("sailor_id", "")).strip()
+        if sailor_id:
+            if not sailor_id.isdigit() or int(sailor_id) not in existing_ids:
+                errors.append(f"{where}: unknown sailor id '{sailor_id}'")
+                return None
+            if last_name and int(sailor_id) not in by_name.get(last_name, ()):
+                errors.append(f"{where}: sailor id {sailor_id} is not named '{last_name}'")
+                return None
+            return int(sailor_id)
+        matches = by_name.get(last_name, ())
+        if not matches:
+            errors.append(f"{where}: unknown sailor '{last_name}'")
+            return None
+        if len(matches) > 1:
+            errors.append(f"{where}: more than one sailor is named '{last_name}'; add a sailor_id column "
+                          f"or assign this one in the app")
+            return None
+        return matches[0]
+
+    by_kind = {kind: [] for kind in KINDS}
+    for source, kind, columns, records in tables:
+        if kind not in KINDS:
+            errors.append(f"{source}: cannot tell whether this is sailors, qualifications or leave "
+                          f"(columns: {', '.join(column for column in columns if column)})")
+            continue
+        missing = [column for column in REQUIRED_COLUMNS[kind] if column not in columns
+                   and not (column == "last_name" and kind != "sailors" and "sailor_id" in columns)]
+        if missing:
+            errors.append(f"{source} line 1: missing column(s) {', '.join(missing)} for {kind}")
+            continue
+        by_kind[kind].append((source, records))
+
+    for source, records in by_kind["sailors"]:  # Sailors first, so later rows can refer to them
+        for line, record in records:
+            where = f"{source} line {line}"
+            rank, last_name = record.get("rank", ""), record.get("last_name", "")
+            if not rank or not last_name:
+                errors.append(f"{where}: rank and last name are both required")
+                continue
+            quals = split_qualifications(record.get("qualifications", ""))
+            if (rank, last_name) in listed:
+                errors.append(f"{where}: {rank} {last_name} is already listed at {listed[rank, last_name]}")
+                continue
+            listed[rank, last_name] = where
+            matches = on_roster.get((rank, last_name), ())
+            if len(matches) > 1:
+                errors.append(f"{where}: more than one {rank} {last_name} is already on the roster; "
+                              f"add their qualifications in the app")
+                continue
+            if matches:  # Already on the roster: only qualifications they lack are added
+                sailor_id, held = matches[0]
+                qualifications.extend((sailor_id, qual) for qual in dict.fromkeys(quals) if qual not in held)
+                continue
+            sailor = (rank, last_name, quals, [])
+            by_name.setdefault(last_name, []).append(sailor)
+            sailors.append(sailor)
+
+    for source, records in by_kind["qualifications"]:
+        for line, record in records:
+            where = f"{source} line {line}"
+            quals = split_qualifications(record.get("qualification", ""))
+            if not (record.get("last_name") or record.get("sailor_id")) or not quals:
+                errors.append(f"{where}: sailor and qualification are both required")
+                continue
+            sailor = resolve(where, record)
+            if isinstance(sailor, int):
+                qualifications.extend((sailor, qual) for qual in quals)
+            elif sailor is not None:
+                sailor[2].extend(quals)
+
+    for source, records in by_kind["leave"]:
+        for line, record in records:
+            where = f"{source} line {line}"
+            leave_type = record.get("type", "")
+            start_date, end_date = parse_date(record.get("start_date", "")), parse_date(record.get("end_date", ""))
+            if not (record.get("last_name") or record.get("sailor_id")) or not leave_type:
+                errors.append(f"{where}: sailor and leave type are both required")
+            elif start_date is None or end_date is None:
+                errors.append(f"{where}: dates must look like 2026-11-01 (got '{record.get('start_date', '')}', "
+                              f"'{record.get('end_date', '')}')")
+            elif end_date < start_date:
+                errors.append(f"{where}: end date {end_date} is before start date {start_date}")
+            else:
+                sailor = resolve(where, record)
+                leave = (start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'), leave_type,
+                         str(record.get("notes", "")))
+                if isinstance(sailor, int):
+                    leaves.append((sailor, *leave))
+                elif sailor is not None:
+                    sailor[3].append(leave)
+
+    if errors:
+        raise RosterImportError(errors)
+    return sailors, qualifications, leaves
+
+
+def import_roster(paths, kind=None):
+    """Validates and loads the given CSV/XLSX files in one transaction.
+
+    kind forces every CSV file (and every XLSX sheet) to be read as one of
+    KINDS instead of recognising it from the header. Returns
+    {"sailors", "qualifications", "leave": row counts, "existing": sailors
+    rows already on the roster, "leave_from": first imported leave date or
+    None}. Raises RosterImportError (nothing written) if any row is invalid.
+    """
+    tables = []
+    for path in paths:
+        tables += read_tables(path, kind)
+    sailors, qualifications, leaves = validate(tables, watchbill_db.get_sailors())
+    watchbill_db.bulk_import(sailors, qualifications, leaves)
+    leave_starts = [start for _, start, _, _, _ in leaves] + [start for *_, own in sailors for start, _, _, _ in own]
+    listed = sum(len(records) for _, table_kind, _, records in tables if table_kind == "sailors")
+    return {"sailors": len(sailors), "existing": listed - len(sailors),
+            "qualifications": len(qualifications) + sum(len(quals) for _, _, quals, _ in sailors),
+            "leave": len(leave_starts), "leave_from": min(map(parse_date, leave_starts), default=None)}
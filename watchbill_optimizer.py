@@ -0,0 +1,249 @@
+"""Anytime local-search improvement and best-of-N selection for generated watchbills.
+
+Simulated annealing over reassignments and swaps, run for a caller-supplied
+time budget. The best bill seen so far is returned when time runs out, so a
+short budget suits the GUI and a long one suits batch runs.
+generate_best_watchbills() instead generates several independently seeded
+candidates per day across a process pool and keeps the best-scoring one.
+"""
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from watchbill_engine import (SOLVERS, EligibilityIndex, LeaveIndex, Occupancy, WorkloadTally, join_units,
+                              slot_overlaps, split_units, station_base_names, watch_intervals, watch_time_key)
+
+DEFAULT_WEIGHTS = {
+    "unfilled": 1000.0,     # Per empty watch; coverage always wins
+    "balance": 1.0,         # Per sailor, watches stood squared
+    "back_to_back": 20.0,   # Per pair of rotating watches less than MIN_REST_MINUTES apart
+    "preference": 5.0,      # Per watch at a station the sailor did not ask for
+}
+MIN_REST_MINUTES = 60  # A watch starting sooner than this after another one ends leaves no rest
+MOVES_PER_MS = 100  # Roughly what optimize_watchbill() manages; converts a time budget into a fixed move count
+
+
+def _rest_pairs(watchtimes):
+    """Returns the (earlier, later) watch indexes with under MIN_REST_MINUTES between one's end and the other's start."""
+    intervals = watch_intervals(watchtimes)
+    return {(i, j) for i, first in enumerate(intervals) for j, second in enumerate(intervals)
+            if first is not None and second is not None and 0 <= second[0] - first[1] < MIN_REST_MINUTES}
+
+
+class _Bill(Occupancy):
+    """Occupancy plus the scoring terms the optimizer minimises."""
+
+    def __init__(self, holder, n_slots, overlaps, preferences, weights, no_rest=frozenset()):
+        super().__init__(holder, n_slots, overlaps)
+        self.preferences = {sailor: set(stations) for sailor, stations in (preferences or {}).items()}
+        self.weights = weights
+        self.no_rest = no_rest  # _rest_pairs() of the day's watch times
+
+    def sailor_terms(self, sailor):
+        """Unweighted (balance, back_to_back, preference) terms for one sailor."""
+        units = self.held.get(sailor, ())
+        watches = sum(len(self.slots(unit)) for unit in units)
+        rotating = [unit[1] for unit in units if unit[1] is not None]
+        back_to_back = sum(1 for a in rotating for b in rotating if (a, b) in self.no_rest)
+        preferred = self.preferences.get(sailor)
+        unpreferred = 0
+        if preferred:
+            unpreferred = sum(len(self.slots(unit)) for unit in units
+                              if not station_base_names(unit[0]) & preferred)
+        return watches * watches, back_to_back, unpreferred
+
+    def sailor_cost(self, sailor):
+        balance, back_to_back, unpreferred = self.sailor_terms(sailor)
+        return (self.weights["balance"] * balance
+                + self.weights["back_to_back"] * back_to_back
+                + self.weights["preference"] * unpreferred)
+
+    def unfilled_cost(self, units):
+        return self.weights["unfilled"] * sum(len(self.slots(unit)) for unit in units if self.holder[unit] is None)
+
+    def breakdown(self):
+        """Returns the score split by component, plus the total. Lower is better."""
+        parts = {"unfilled": self.unfilled_cost(self.holder), "balance": 0.0, "back_to_back": 0.0, "preference": 0.0}
+        for sailor in self.held:
+            for name, term in zip(("balance", "back_to_back", "preference"), self.sailor_terms(sailor)):
+                parts[name] += self.weights[name] * term
+        parts["total"] = sum(parts.values())
+        return parts
+
+
+def score_watchbill(watchbill_data, watchtimes, preferences=None, weights=None):
+    """Scores a watchbill; returns {component: cost, ..., "total": cost}. Lower is better.
+
+    preferences optionally maps a sailor id to the stations (or base
+    qualifications, e.g. "Sentry") they prefer to stand.
+    """
+    keys = [watch_time_key(start, end) for start, end, *_ in watchtimes]
+    bill = _Bill(split_units(watchbill_data, keys), len(keys), slot_overlaps(watchtimes), preferences,
+                 dict(DEFAULT_WEIGHTS, **(weights or {})), _rest_pairs(watchtimes))
+    return bill.breakdown()
+
+
+def format_breakdown(breakdown):
+    """Formats a score breakdown as one line, e.g. "score 42 (unfilled 0, balance 22, ...)"."""
+    parts = ", ".join(f"{name.replace('_', '-')} {cost:g}" for name, cost in breakdown.items() if name != "total")
+    return f"score {breakdown['total']:g} ({parts})"
+
+
+def optimize_watchbill(watchbill_data, watchtimes, eligibility, on_leave=(), budget_ms=200,
+                       preferences=None, weights=None, rng=None, moves=None):
+    """Improves a watchbill by simulated annealing until budget_ms has elapsed.
+
+    eligibility is the EligibilityIndex the bill was generated from and on_leave
+    the sailors unavailable that day. Never introduces a double booking.
+    moves, if given, replaces the time budget with a fixed number of moves, so
+    a seeded rng gives the same bill however fast or busy the machine is.
+    Returns (watchbill_data, score breakdown) for the best bill found.
+    """
+    rng = rng or random
+    weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+    keys = [watch_time_key(start, end) for start, end, *_ in watchtimes]
+    stations = list(watchbill_data)
+    overlaps, no_rest = slot_overlaps(watchtimes), _rest_pairs(watchtimes)
+    bill = _Bill(split_units(watchbill_data, keys), len(keys), overlaps, preferences, weights, no_rest)
+    units = list(bill.holder)
+    candidates = {station: [sailor for sailor in eligibility.eligible(station) if sailor not in on_leave]
+                  for station in stations}
+    qualified = {station: set(pool) for station, pool in candidates.items()}
+
+    current = bill.breakdown()["total"]
+    best, best_holder = current, dict(bill.holder)
+    if not units:
+        return join_units(best_holder, keys, stations), bill.breakdown()
+
+    start_temperature = temperature = weights["back_to_back"]
+    started = time.perf_counter()
+    deadline = started + budget_ms / 1000.0
+    iteration = 0
+    while True:
+        iteration += 1
+        if iteration % 64 == 0:  # Check the budget (and cool down) every few moves
+            if moves is not None:
+                remaining = 1.0 - iteration / moves
+            else:
+                now = time.perf_counter()
+                remaining = (deadline - now) / (deadline - started)
+            if remaining <= 0:
+                break
+            temperature = max(start_temperature * remaining, 1e-3)
+
+        unit = rng.choice(units)
+        a = bill.holder[unit]
+        if a is not None and rng.random() < 0.5:
+            # Swap holders with another unit both sailors are qualified for
+            other = rng.choice(units)
+            b = bill.holder[other]
+            if other == unit or b is None or a == b:
+                continue
+            if a not in qualified[other[0]] or b not in qualified[unit[0]]:
+                continue
+            vacating = {unit, other}
+            if not (bill.can_take(a, other, vacating) and bill.can_take(b, unit, vacating)):
+                continue
+            affected = {a, b}
+            before = sum(bill.sailor_cost(sailor) for sailor in affected)
+            bill.move(unit, None)
+            bill.move(other, a)
+            bill.move(unit, b)
+            delta = sum(bill.sailor_cost(sailor) for sailor in affected) - before
+
+            def undo():
+                bill.move(unit, None)
+                bill.move(other, b)
+                bill.move(unit, a)
+        else:
+            # Hand the unit to another qualified, free sailor
+            pool = candidates[unit[0]]
+            if not pool:
+                continue
+            c = rng.choice(pool)
+            if c == a or not bill.can_take(c, unit, {unit}):
+                continue
+            affected = {c} | ({a} if a is not None else set())
+            before = sum(bill.sailor_cost(sailor) for sailor in affected) + bill.unfilled_cost((unit,))
+            bill.move(unit, c)
+            delta = sum(bill.sailor_cost(sailor) for sailor in affected) + bill.unfilled_cost((unit,)) - before
+
+            def undo():
+                bill.move(unit, a)
+
+        if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+            current += delta
+            if current < best - 1e-9:
+                best, best_holder = current, dict(bill.holder)
+        else:
+            undo()
+
+    best_bill = _Bill(best_holder, len(keys), overlaps, preferences, weights, no_rest)
+    return join_units(best_holder, keys, stations), best_bill.breakdown()
+
+
+# --- Best-of-N generation ---
+_worker_inputs = None  # Per-process (watchstations, watchtimes, eligibility, leave_index), see _init_worker()
+
+
+def _init_worker(watchstations, watchtimes, eligibility, leaves):
+    """Receives the day-independent inputs once per worker process instead of once per candidate."""
+    global _worker_inputs
+    _worker_inputs = (watchstations, watchtimes, eligibility, LeaveIndex(leaves))
+
+
+def _generate_candidate(day, seed, tally, method, optimize_ms, optimize_moves, preferences, weights):
+    """Generates and scores one candidate bill for day; returns (breakdown, watchbill_data)."""
+    watchstations, watchtimes, eligibility, leave_index = _worker_inputs
+    rng = random.Random(seed)
+    on_leave = leave_index.unavailable_on(day)
+    watchbill_data = SOLVERS[method](watchstations, watchtimes, eligibility, on_leave, rng, tally)
+    if optimize_ms or optimize_moves:
+        watchbill_data, breakdown = optimize_watchbill(watchbill_data, watchtimes, eligibility, on_leave,
+                                                       budget_ms=optimize_ms, preferences=preferences,
+                                                       weights=weights, rng=rng, moves=optimize_moves)
+        return breakdown, watchbill_data
+    return score_watchbill(watchbill_data, watchtimes, preferences, weights), watchbill_data
+
+
+def generate_best_watchbills(start_date, end_date, watchstations, watchtimes, sailors, leaves, candidates=8,
+                             workers=None, seed=None, eligibility=None, method="matching", optimize_ms=0,
+                             optimize_moves=None, preferences=None, weights=None, tally=None):
+    """Generates candidates independently seeded bills per day and keeps the best-scoring one.
+
+    Candidates run in a pool of workers processes (default: one per CPU core)
+    and are scored by score_watchbill() on coverage, balance and rest. The
+    same seed gives the same bills however many workers are used, as long as
+    the optimizer is off or given optimize_moves instead of an optimize_ms
+    time budget. Takes the same inputs as watchbill_engine.create_watchbills().
+    Yields (date, watchbill_data, breakdown) in date order.
+    """
+    seeds = random.Random(seed)
+    tally = tally or WorkloadTally()
+    eligibility = eligibility or EligibilityIndex(watchstations, sailors)
+    workers = max(1, min(workers or os.cpu_count() or 1, candidates))
+    initargs = (watchstations, watchtimes, eligibility, leaves)
+    pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) if workers > 1 else None
+    if pool is None:
+        _init_worker(*initargs)
+    try:
+        day = start_date
+        while day <= end_date:
+            tally.advance(day)
+            jobs = [(day, seeds.getrandbits(32), tally, method, optimize_ms, optimize_moves, preferences, weights)
+                    for _ in range(candidates)]
+            if pool is None:
+                results = [_generate_candidate(*job) for job in jobs]
+            else:
+                results = list(pool.map(_generate_candidate, *zip(*jobs)))
+            # Ties go to the earliest candidate, so the choice does not depend on scheduling
+            breakdown, watchbill_data = min(results, key=lambda result: result[0]["total"])
+            tally.add_watchbill(day, watchbill_data, watchtimes)
+            yield day, watchbill_data, breakdown
+            day += timedelta(days=1)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
@@ -0,0 +1,130 @@
+"""Opt-in profiling of watchbill generation.
+
+A Profiler records wall time per phase of a run (load, availability,
+eligibility, assignment, save, render) and can dump a cProfile of the whole
+run for pstats. Profiling is off unless asked for, and code that accepts a
+profiler treats None as "don't time anything":
+
+    WATCHBILL_PROFILE=1                     # print per-phase timings for each run
+    WATCHBILL_PROFILE=generate.pstats       # ...and write a cProfile dump as well
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+PHASES = ("load", "availability", "eligibility", "assignment", "save", "render")
+
+
+class Profiler:
+    """Wall time per phase for one run, plus an optional cProfile written to pstats_path."""
+
+    def __init__(self, pstats_path=None):
+        self.pstats_path = pstats_path
+        self.times = {}
+        self.total = 0.0
+        self._profile = None
+        self._thread_profiles = []
+        self._started = None
+
+    @contextmanager
+    def phase(self, name):
+        """Adds the time spent inside the with-block to phase name."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] = self.times.get(name, 0.0) + time.perf_counter() - started
+
+    def iterate(self, name, iterable):
+        """Yields from iterable, adding the time spent producing each item to phase name.
+
+        For generators whose work cannot be timed from inside, such as
+        best-of-N candidates coming back from worker processes.
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def start(self):
+        """Starts the wall clock, and cProfile for the calling thread if a pstats path was given."""
+        if self.pstats_path:
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._started = time.perf_counter()
+
+    def stop(self):
+        """Stops the clock and writes the cProfile dump, including any worker threads profiled with thread()."""
+        self.total = time.perf_counter() - self._started
+        if self._profile is not None:
+            self._profile.disable()
+            import pstats
+            pstats.Stats(self._profile, *self._thread_profiles).dump_stats(self.pstats_path)
+
+    @contextmanager
+    def thread(self):
+        """Profiles the calling worker thread as well; cProfile only sees the thread that enabled it."""
+        if not self.pstats_path:
+            yield
+            return
+        import cProfile
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._thread_profiles.append(profile)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+    def summary(self):
+        """One line, e.g. "load 12 ms, availability 3 ms, ... (total 80 ms)"."""
+        names = [name for name in PHASES if name in self.times] + [name for name in self.times if name not in PHASES]
+        parts = ", ".join(f"{name} {self.times[name] * 1000:.0f} ms" for name in names)
+        line = f"{parts} (total {self.total * 1000:.0f} ms)"
+        if self.pstats_path:
+            line += f"; cProfile written to {self.pstats_path}"
+        return line
+
+    def report(self, label):
+        """Prints the summary to stderr, where the GUI and the CLI keep their logs."""
+        print(f"[profile] {label}: {self.summary()}", file=sys.stderr, flush=True)
+
+
+def _untimed(name):
+    return nullcontext()
+
+
+def phase_timer(profiler):
+    """Returns profiler.phase, or a no-op stand-in when profiler is None."""
+    return profiler.phase if profiler is not None else _untimed
+
+
+def thread_profile(profiler):
+    """Returns profiler.thread() for a worker thread, or a no-op stand-in when profiler is None."""
+    return profiler.thread() if profiler is not None else nullcontext()
+
+
+def profiler_from_env():
+    """Returns a Profiler if WATCHBILL_PROFILE is set, else None.
+
+    "1" (or any other value without a .pstats/.prof suffix) records phase
+    timings only; a file name also dumps a cProfile there.
+    """
+    setting = os.environ.get("WATCHBILL_PROFILE", "")
+    if not setting or setting == "0":
+        return None
+    return Profiler(setting if setting.endswith((".pstats", ".prof")) else None)
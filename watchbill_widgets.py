@@ -0,0 +1,269 @@
+"""Tk widgets for showing and editing watchbills.
+
+VirtualGrid draws a table on a Canvas, but only the cells currently in view,
+so a bill with hundreds of stations (or a notebook of a month of them) costs
+the same to open as a small one. SailorPicker is the pick list opened from a
+cell: a search box over a prepared list of names, filtered as you type.
+BackgroundTask runs slow work such as generation on a worker thread and
+hands its results back to the Tk thread, with ProgressDialog to show
+progress and offer a cancel button.
+"""
+import queue
+import threading
+import tkinter as tk
+import tkinter.font as tkfont
+from bisect import bisect_right
+from tkinter import ttk
+
+HEADER_BACKGROUND = "#d9d9d9"
+GRID_LINE = "#b0b0b0"
+
+
+class VirtualGrid(tk.Frame):
+    """A read-mostly table that only draws the rows and columns in view.
+
+    rows is a list of lists of strings, one per row, the first value being the
+    row label. The header row and the label column stay put while the rest
+    scrolls. on_double_click(row, column) is called with data indexes, column
+    0 being the label column.
+    """
+
+    def __init__(self, master, columns, rows, on_double_click=None, height=400, **kwargs):
+        super().__init__(master, **kwargs)
+        self.columns = list(columns)
+        self.rows = rows
+        self.on_double_click = on_double_click
+        self.font = tkfont.nametofont("TkDefaultFont")
+        self.row_height = self.font.metrics("linespace") + 8
+
+        self.bold_font = tkfont.Font(font=self.font)
+        self.bold_font.configure(weight="bold")
+
+        # Widths come from the header plus the longest label, not from measuring every cell
+        label_width = self.bold_font.measure(self.columns[0])
+        if rows:
+            label_width = max(label_width, self.bold_font.measure(max((row[0] for row in rows), key=len)))
+        cell_width = self.font.measure("LTJG " + "M" * 10)
+        self.widths = [label_width + 16] + [max(cell_width, self.font.measure(name)) + 16 for name in self.columns[1:]]
+        self.offsets = [0]
+        for width in self.widths:
+            self.offsets.append(self.offsets[-1] + width)
+
+        self.canvas = tk.Canvas(self, background="white", highlightthickness=0,
+                                width=min(self.offsets[-1], 1200), height=min((len(rows) + 1) * self.row_height, height))
+        y_scroll = tk.Scrollbar(self, orient=tk.VERTICAL, command=self._yview)
+        x_scroll = tk.Scrollbar(self, orient=tk.HORIZONTAL, command=self._xview)
+        self.canvas.configure(yscrollcommand=y_scroll.set, xscrollcommand=x_scroll.set,
+                              scrollregion=(0, 0, self.offsets[-1], (len(rows) + 1) * self.row_height),
+                              xscrollincrement=1, yscrollincrement=self.row_height)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        y_scroll.grid(row=0, column=1, sticky="ns")
+        x_scroll.grid(row=1, column=0, sticky="ew")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.canvas.bind("<Configure>", lambda event: self.redraw())
+        self.canvas.bind("<Double-Button-1>", self._on_double_click)
+        self.canvas.bind("<MouseWheel>", lambda event: self._yview("scroll", -1 if event.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda event: self._yview("scroll", -1, "units"))  # X11 wheel up
+        self.canvas.bind("<Button-5>", lambda event: self._yview("scroll", 1, "units"))  # X11 wheel down
+        self.canvas.bind("<Shift-MouseWheel>", lambda event: self._xview("scroll", -40 if event.delta > 0 else 40, "units"))
+
+    def _yview(self, *args):
+        self.canvas.yview(*args)
+        self.redraw()
+
+    def _xview(self, *args):
+        self.canvas.xview(*args)
+        self.redraw()
+
+    def _visible(self):
+        """Returns (left, top, first_row, last_row, first_column, last_column) for the current view."""
+        left, top = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        first_row = max(0, int(top // self.row_height))
+        last_row = min(len(self.rows), int((top + height) // self.row_height) + 1)
+        first_column = max(1, bisect_right(self.offsets, left + self.widths[0]) - 1)
+        last_column = min(len(self.columns), bisect_right(self.offsets, left + width))
+        return left, top, first_row, last_row, first_column, last_column
+
+    def _cell(self, x0, y0, width, text, fill, bold=False):
+        canvas = self.canvas
+        canvas.create_rectangle(x0, y0, x0 + width, y0 + self.row_height, fill=fill, outline=GRID_LINE)
+        canvas.create_text(x0 + 6, y0 + self.row_height / 2, text=text, anchor="w",
+                           font=self.bold_font if bold else self.font)
+
+    def redraw(self):
+        """Draws the cells in view; runs after every scroll or resize."""
+        self.canvas.delete("all")
+        left, top, first_row, last_row, first_column, last_column = self._visible()
+        row_height = self.row_height
+        for index in range(first_row, last_row):  # Data rows scroll both ways
+            y0 = (index + 1) * row_height
+            row = self.rows[index]
+            for column in range(first_column, last_column):
+                self._cell(self.offsets[column], y0, self.widths[column], row[column], "white")
+        for column in range(first_column, last_column):  # Header row stays at the top
+            self._cell(self.offsets[column], top, self.widths[column], self.columns[column], HEADER_BACKGROUND, True)
+        for index in range(first_row, last_row):  # Label column stays at the left
+            self._cell(left, (index + 1) * row_height, self.widths[0], self.rows[index][0], "#f2f2f2", True)
+        self._cell(left, top, self.widths[0], self.columns[0], HEADER_BACKGROUND, True)
+
+    def cell_at(self, x, y):
+        """Returns the (row, column) data indexes under widget coordinates x, y, or None for the header."""
+        left, top = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        if y < self.row_height:
+            return None
+        row = int((top + y) // self.row_height) - 1
+        column = 0 if x < self.widths[0] else bisect_right(self.offsets, left + x) - 1
+        if 0 <= row < len(self.rows) and 0 <= column < len(self.columns):
+            return row, column
+        return None
+
+    def set(self, row, column, text):
+        """Changes one cell's text."""
+        self.rows[row][column] = text
+        self.redraw()
+
+    def _on_double_click(self, event):
+        cell = self.cell_at(event.x, event.y)
+        if cell is not None and self.on_double_click is not None:
+            self.on_double_click(*cell)
+
+
+class SailorPicker(tk.Toplevel):
+    """Pick list of "RANK Name" choices with type-to-search.
+
+    choices is a list of (label, value) pairs prepared by the caller;
+    on_select(value) is called when one is double-clicked or Enter is pressed.
+    """
+
+    def __init__(self, master, choices, on_select, title="Select Sailor"):
+        super().__init__(master)
+        self.title(title)
+        self.choices = choices
+        self.on_select = on_select
+        self.shown = choices
+
+        self.search = tk.StringVar()
+        entry = tk.Entry(self, textvariable=self.search)
+        entry.pack(fill=tk.X, padx=5, pady=5)
+        self.listbox = tk.Listbox(self, width=30, height=20)
+        self.listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=(0, 5))
+        self._fill()
+
+        self.search.trace_add("write", lambda *args: self._filter())
+        entry.bind("<Return>", lambda event: self._pick(0))
+        entry.bind("<Down>", lambda event: self.listbox.focus_set())
+        self.listbox.bind("<Double-Button-1>", lambda event: self._pick_selected())
+        self.listbox.bind("<Return>", lambda event: self._pick_selected())
+        entry.focus_set()
+
+    def _fill(self):
+        self.listbox.delete(0, tk.END)
+        if self.shown:
+            self.listbox.insert(tk.END, *(label for label, _ in self.shown))  # One call for the whole list
+            self.listbox.selection_set(0)
+
+    def _filter(self):
+        text = self.search.get().strip().lower()
+        self.shown = [choice for choice in self.choices if text in choice[0].lower()] if text else self.choices
+        self._fill()
+
+    def _pick_selected(self):
+        selection = self.listbox.curselection()
+        if selection:
+            self._pick(selection[0])
+
+    def _pick(self, index):
+        if 0 <= index < len(self.shown):
+            value = self.shown[index][1]
+            self.destroy()
+            self.on_select(value)
+
+
+class BackgroundTask:
+    """Runs a generator on a worker thread and hands each item it yields to the Tk thread.
+
+    make_items is called on the worker thread and must not touch Tk or the
+    database connection; on_item(item) and on_done(cancelled, error) run on
+    the Tk thread, which polls for results with widget.after() so the event
+    loop stays free. cancel() stops the generator before its next item and
+    closes it, so its own clean-up (such as shutting a process pool) runs.
+    """
+
+    def __init__(self, widget, make_items, on_item, on_done, poll_ms=50, items_per_poll=4):
+        self.widget = widget
+        self.make_items = make_items
+        self.on_item = on_item
+        self.on_done = on_done
+        self.poll_ms = poll_ms
+        self.items_per_poll = items_per_poll  # Bounds the Tk work done between two chances to redraw
+        self._results = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self.widget.after(self.poll_ms, self._poll)
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def _run(self):
+        try:
+            items = self.make_items()
+            try:
+                for item in items:
+                    self._results.put(("item", item))
+                    if self._cancel.is_set():
+                        break
+            finally:
+                items.close()
+            self._results.put(("done", None))
+        except Exception as e:  # Reported on the Tk thread
+            self._results.put(("done", e))
+
+    def _poll(self):
+        for _ in range(self.items_per_poll):
+            try:
+                kind, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "done":
+                self.on_done(self.cancelled, value)
+                return
+            if not self.cancelled:
+                self.on_item(value)
+        self.widget.after(self.poll_ms, self._poll)
+
+
+class ProgressDialog(tk.Toplevel):
+    """Small window with a progress bar, a status line and a Cancel button."""
+
+    def __init__(self, master, title, maximum, on_cancel):
+        super().__init__(master)
+        self.title(title)
+        self.resizable(False, False)
+        self.status = tk.Label(self, text="Starting...", width=40, anchor="w")
+        self.status.pack(padx=10, pady=(10, 5))
+        self.bar = ttk.Progressbar(self, length=300, mode="determinate", maximum=maximum)
+        self.bar.pack(padx=10, pady=5)
+        self.cancel_button = tk.Button(self, text="Cancel", command=self._cancel)
+        self.cancel_button.pack(pady=(5, 10))
+        self.protocol("WM_DELETE_WINDOW", self._cancel)
+        self.on_cancel = on_cancel
+
+    def update_progress(self, done, text):
+        self.bar["value"] = done
+        self.status.config(text=text)
+
+    def _cancel(self):
+        self.status.config(text="Cancelling...")
+        self.cancel_button.config(state=tk.DISABLED)
+        self.on_cancel()